@@ -1,8 +1,9 @@
+import hashlib
 from dataclasses import dataclass, field
 from typing import List, Optional, Dict, Any
 from pg_compose_core.lib.ast.objects import ASTObject, BuildStage
 
-@dataclass
+@dataclass(slots=True)
 class FunctionParameter:
     """Represents a function parameter."""
     name: str
@@ -10,7 +11,7 @@ class FunctionParameter:
     mode: Optional[str] = None  # IN, OUT, INOUT, VARIADIC
     default_value: Optional[str] = None
 
-@dataclass
+@dataclass(slots=True)
 class FunctionASTObject(ASTObject):
     """
     Extended ASTObject specifically for functions with additional function metadata.
@@ -31,12 +32,12 @@ class FunctionASTObject(ASTObject):
         # Only set query_type to FUNCTION if it's not already set (for procedures)
         if self.query_type == BuildStage.UNKNOWN:
             self.query_type = BuildStage.FUNCTION
-        super().__post_init__()
+        # Zero-argument super() does not work in slotted dataclasses
+        ASTObject.__post_init__(self)
         if self.signature_hash is None:
             self.signature_hash = self._generate_signature_hash()
 
     def _generate_signature_hash(self) -> str:
-        import hashlib
         signature_parts = []
         for param in self.parameters:
             param_str = f"{param.name}:{param.data_type}"
@@ -74,7 +75,7 @@ class FunctionASTObject(ASTObject):
         return " ".join(parts)
 
     def to_dict(self) -> Dict[str, Any]:
-        base_dict = super().to_dict()
+        base_dict = ASTObject.to_dict(self)
         base_dict.update({
             "parameters": [{"name": p.name, "data_type": p.data_type, "mode": p.mode, "default_value": p.default_value} for p in self.parameters],
             "return_type": self.return_type,
@@ -1,8 +1,7 @@
-from typing import List, Optional, Dict, Any, Tuple
+from typing import List, Optional, Dict, Any
 from dataclasses import dataclass, field
 from enum import Enum
-import hashlib
-import re
+from pg_compose_core.lib.hashing import query_hash as _query_hash
 
 class BuildStage(Enum):
     """Enumeration of possible build stages for database objects."""
@@ -36,7 +35,7 @@ class ResourceType(Enum):
     DATABASE = "database"
     UNKNOWN = "unknown"
 
-@dataclass
+@dataclass(slots=True)
 class ASTObject:
     """
     Represents a parsed SQL AST object with all necessary metadata.
@@ -70,25 +69,8 @@ class ASTObject:
             self.query_hash = self._generate_hash()
     
     def _generate_hash(self) -> str:
-        """Generate a hash of the normalized command."""
-        normalized = self._normalize_sql(self.command)
-        return hashlib.sha256(normalized.encode()).hexdigest()
-    
-    def _normalize_sql(self, sql: str) -> str:
-        """Normalize SQL by removing whitespace differences while preserving structure."""
-        # Remove comments
-        sql = re.sub(r'--.*$', '', sql, flags=re.MULTILINE)
-        sql = re.sub(r'/\*.*?\*/', '', sql, flags=re.DOTALL)
-        
-        # Normalize whitespace
-        sql = re.sub(r'\s+', ' ', sql)  # Replace multiple whitespace with single space
-        sql = re.sub(r'\s*([,()])\s*', r'\1', sql)  # Remove spaces around commas and parentheses
-        sql = sql.strip()
-        
-        # Normalize case for keywords (optional, but helps with consistency)
-        sql = sql.upper()
-        
-        return sql
+        """Generate a hash of the normalized command, the same way the parser does."""
+        return _query_hash(self.command)
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary format for backward compatibility."""
@@ -2,7 +2,7 @@ from dataclasses import dataclass, field
 from typing import List, Optional, Dict, Any, Tuple
 from pg_compose_core.lib.ast.objects import ASTObject, BuildStage
 
-@dataclass
+@dataclass(slots=True)
 class TableColumn:
     name: str
     data_type: str
@@ -10,20 +10,20 @@ class TableColumn:
     default: Optional[str] = None
     # You can add more fields as needed (e.g., collation, comment)
 
-@dataclass
+@dataclass(slots=True)
 class TableConstraint:
     name: Optional[str]
     constraint_type: str  # e.g., 'PRIMARY KEY', 'FOREIGN KEY', 'UNIQUE', 'CHECK'
     columns: List[str] = field(default_factory=list)
     details: Optional[Dict[str, Any]] = None  # For FK target, check expr, etc.
 
-@dataclass
+@dataclass(slots=True)
 class TablePartition:
     partition_type: str  # 'RANGE', 'LIST', 'HASH'
     columns: List[str]
     bounds: Optional[str] = None  # e.g., FOR VALUES FROM (...) TO (...)
 
-@dataclass
+@dataclass(slots=True)
 class TableASTObject(ASTObject):
     columns: List[TableColumn] = field(default_factory=list)
     constraints: List[TableConstraint] = field(default_factory=list)
@@ -32,7 +32,8 @@ class TableASTObject(ASTObject):
 
     def __post_init__(self):
         self.query_type = BuildStage.BASE_TABLE
-        super().__post_init__()
+        # Zero-argument super() does not work in slotted dataclasses
+        ASTObject.__post_init__(self)
 
     def diff(self, source: 'TableASTObject') -> Tuple[List[TableColumn], List[TableColumn], List[Tuple[TableColumn, TableColumn]]]:
         """
@@ -1,3 +1,4 @@
+import logging
 from typing import List, Optional
 from pg_compose_core.lib.parser import load_source
 from pg_compose_core.lib.diff import diff_schemas
@@ -29,7 +30,6 @@ def diff_sort(
     schema_a = load_source(source_a, schemas=schemas, grants=grants)
     schema_b = load_source(source_b, schemas=schemas, grants=grants)
     
-    import logging
     logging.info(f"Loaded {len(schema_a)} objects from source A")
     logging.info(f"Loaded {len(schema_b)} objects from source B")
     
@@ -77,7 +77,6 @@ def deploy(
         ast_list = ASTList([])  # Placeholder
     
     if verbose:
-        import logging
         logging.info(f"Deploying to {target}")
         if isinstance(source, ASTList):
             logging.info(f"Deploying {len(ast_list)} commands")
@@ -6,7 +6,9 @@ Generates migration commands by comparing two ASTLists.
 from typing import List, Optional
 from pg_compose_core.lib.ast.objects import ASTObject, BuildStage
 from pg_compose_core.lib.ast.function import FunctionASTObject
+from pg_compose_core.lib.ast.table import TableASTObject
 from pg_compose_core.lib.ast.list import ASTList
+from pg_compose_core.lib.parser import load_source, parse_sql_to_ast_objects
 
 def diff_schemas(base: ASTList, updated: ASTList) -> ASTList:
     """
@@ -81,8 +83,6 @@ def _generate_drop_command(obj: ASTObject) -> ASTObject:
         command = f"DROP POLICY {obj.object_name} ON {table_name};"
     elif obj.query_type == BuildStage.GRANT:
         # For grants, generate a REVOKE command by parsing the SQL
-        from pg_compose_core.lib.parser import parse_sql_to_ast_objects
-        
         # Extract original object name from grant object name
         # Format: grant_PRIVILEGES_on_OBJECT_to_GRANTEE
         grant_parts = obj.object_name.split('_')
@@ -181,8 +181,6 @@ def _generate_alter_commands(old_obj: ASTObject, new_obj: ASTObject) -> List[AST
     elif old_obj.query_type == BuildStage.GRANT:
         # For grants, revoke old and grant new
         # Parse the GRANT statements to get proper AST objects with unique query hashes
-        from pg_compose_core.lib.parser import parse_sql_to_ast_objects
-        
         # Extract original object name, privileges, and grantees from old grant object name
         # Format: grant_PRIVILEGES_on_OBJECT_to_GRANTEE
         old_grant_parts = old_obj.object_name.split('_')
@@ -222,8 +220,6 @@ def _generate_table_alter_commands(old_obj: ASTObject, new_obj: ASTObject) -> Li
     table_name = new_obj.qualified_name
     
     # Check if both objects are TableASTObject instances
-    from pg_compose_core.lib.ast.table import TableASTObject
-    
     if isinstance(old_obj, TableASTObject) and isinstance(new_obj, TableASTObject):
         # Get the differences
         added_columns, removed_columns, changed_columns = new_obj.diff(old_obj)
@@ -323,8 +319,6 @@ def _generate_table_alter_commands(old_obj: ASTObject, new_obj: ASTObject) -> Li
 # Legacy compatibility function
 def compare_sources(source_a: str, source_b: str, schemas: Optional[List[str]] = None, grants: bool = True) -> ASTList:
     """Legacy function for backward compatibility."""
-    from pg_compose_core.lib.parser import load_source
-    
     # Load both sources
     schema_a = load_source(source_a, schemas=schemas, grants=grants)
     schema_b = load_source(source_b, schemas=schemas, grants=grants)
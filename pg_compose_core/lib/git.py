@@ -1,17 +1,92 @@
-
 import tempfile
 import subprocess
+import hashlib
 import os
 import re
+import shutil
+import stat
+import sys
+from contextlib import contextmanager
+from typing import Optional
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+_COMMIT_HASH_RE = re.compile(r'[a-fA-F0-9]{40}')
+
+# Clones are cached here and reused across runs, keyed by repository URL and ref
+GIT_CACHE_DIR = os.environ.get(
+    "PG_COMPOSE_GIT_CACHE",
+    os.path.join(os.path.expanduser("~"), ".cache", "pg-compose", "git")
+)
+
+def _force_writable(func, path, exc_info):
+    """rmtree error handler that clears read-only bits (git pack files on Windows) and retries."""
+    os.chmod(path, stat.S_IWRITE)
+    func(path)
+
+def _remove_tree(path: str):
+    """Remove a clone with _force_writable as the error handler."""
+    # onerror is deprecated since Python 3.12 in favour of onexc
+    if sys.version_info >= (3, 12):
+        shutil.rmtree(path, onexc=_force_writable)
+    else:
+        shutil.rmtree(path, onerror=_force_writable)
+
+def _lock_shared(cache_dir: str):
+    """Share-lock a cache generation for as long as the returned file stays open."""
+    if fcntl is None:
+        return None
+    lock_file = open(f"{cache_dir}.lock", "w")
+    fcntl.flock(lock_file, fcntl.LOCK_SH)
+    return lock_file
+
+def _remove_unused_generations(key: str, current: str):
+    """Remove the generations of a cache entry, other than current, that nothing is reading."""
+    prefix = f"{key}-"
+    for name in os.listdir(GIT_CACHE_DIR):
+        path = os.path.join(GIT_CACHE_DIR, name)
+        if not name.startswith(prefix) or name.endswith(".lock") or path == current or not os.path.isdir(path):
+            continue
+        if fcntl is None:
+            _remove_tree(path)
+            continue
+        with open(f"{path}.lock", "w") as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                continue  # Still being read, a later checkout removes it
+            shutil.rmtree(path, ignore_errors=True)
+            os.remove(f"{path}.lock")
+
+@contextmanager
+def _cache_lock(cache_dir: str):
+    """Serialize access to a cache entry across processes."""
+    if fcntl is None:
+        yield
+        return
+    with open(f"{cache_dir}.lock", "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
 
 class GitRepoContext:
     """Context manager for git repository operations."""
     
-    def __init__(self, repo_url: str, target_path: str = None):
+    def __init__(self, repo_url: str, target_path: str = None, use_cache: bool = True, bare: bool = False):
         self.repo_url = repo_url
         self.target_path = target_path
+        self.use_cache = use_cache
+        self.bare = bare
         self.tmp_dir = None
         self.working_dir = None
+        self._rev = "HEAD"
+        self._cat_file = None
+        self._generation_lock = None
         
     def __enter__(self):
         """Clone the repository and return the working directory path."""
@@ -20,23 +95,128 @@ class GitRepoContext:
         repo_url = self.repo_url
         if "#" in repo_url:
             repo_url, ref = repo_url.split("#", 1)
-
         
+        # Determine if ref is a commit hash (40-character hex string) or branch
+        is_commit = ref is not None and len(ref) == 40 and _COMMIT_HASH_RE.fullmatch(ref) is not None
+        if is_commit:
+            self._rev = ref
+        
+        if self.use_cache:
+            self.tmp_dir = self._checkout_cached(repo_url, ref, is_commit)
+        else:
+            self.tmp_dir = self._make_tmp_dir()
+            self._clone(repo_url, ref, is_commit, self.tmp_dir)
+        
+        # Always return the repository root as working directory
+        # The target_path will be used by the caller to construct the full path
+        self.working_dir = self.tmp_dir
+        
+        # Check if the target_path exists in the repository
+        if self.target_path and not self.bare:
+            target_full_path = os.path.join(self.tmp_dir, self.target_path)
+            if not os.path.exists(target_full_path):
+                # If it's a directory path (doesn't end with .sql), it should exist
+                if not self.target_path.endswith('.sql'):
+                    # __exit__ won't run for a failed __enter__, so release the checkout here
+                    self.__exit__(None, None, None)
+                    raise ValueError(f"Directory path '{self.target_path}' does not exist in repository")
+                # If it's a .sql file that doesn't exist, that's fine - it will be treated as new
+        
+        return self.working_dir
+    
+    def _make_tmp_dir(self) -> str:
+        """Create a fresh temporary directory for a clone."""
         # Try different temp directory locations to avoid permission issues
         for temp_location in [None, os.path.expanduser("~/temp"), os.path.expanduser("~/Desktop/temp")]:
             try:
                 if temp_location:
                     os.makedirs(temp_location, exist_ok=True)
-                self.tmp_dir = tempfile.mkdtemp(dir=temp_location)
-                break
+                return tempfile.mkdtemp(dir=temp_location)
             except (OSError, PermissionError):
                 continue
         
-        if self.tmp_dir is None:
-            raise ValueError("Could not create temporary directory due to permission issues")
+        raise ValueError("Could not create temporary directory due to permission issues")
+    
+    def _checkout_cached(self, repo_url: str, ref: str, is_commit: bool) -> str:
+        """Return a cached checkout of repo_url at ref, cloning or refreshing it as needed.
         
-        # Determine if ref is a commit hash (40-character hex string) or branch
-        is_commit = ref and re.match(r'^[a-fA-F0-9]{40}$', ref)
+        Every clone is a generation directory that is never modified once published;
+        the entry's pointer file names the current one. A refresh clones a new
+        generation and repoints the entry, and the generation returned here stays
+        share-locked until __exit__, so no other process rewrites or removes it while
+        it is being read.
+        """
+        key = hashlib.sha256(f"{repo_url}|{ref}|{self.target_path or ''}|{self.bare}".encode()).hexdigest()[:16]
+        pointer = os.path.join(GIT_CACHE_DIR, f"{key}.current")
+        os.makedirs(GIT_CACHE_DIR, exist_ok=True)
+        
+        with _cache_lock(os.path.join(GIT_CACHE_DIR, key)):
+            cache_dir = self._current_generation(pointer)
+            # A commit never changes, so only branches need refreshing
+            if cache_dir is not None and (not self._has_commit(cache_dir, ref) if is_commit
+                                          else self._branch_moved(cache_dir, ref)):
+                cache_dir = None
+            
+            if cache_dir is None:
+                # Clone into a fresh generation and publish it only once the clone and
+                # checkout succeeded, so a failure never leaves a wrong tree in the cache
+                cache_dir = tempfile.mkdtemp(prefix=f"{key}-", dir=GIT_CACHE_DIR)
+                try:
+                    self._clone(repo_url, ref, is_commit, cache_dir)
+                    with open(f"{pointer}.tmp", "w") as f:
+                        f.write(os.path.basename(cache_dir))
+                    os.replace(f"{pointer}.tmp", pointer)
+                except BaseException:
+                    shutil.rmtree(cache_dir, ignore_errors=True)
+                    raise
+            
+            # Lock before the entry lock is released, so a concurrent refresh can't remove it first
+            self._generation_lock = _lock_shared(cache_dir)
+            _remove_unused_generations(key, cache_dir)
+        
+        return cache_dir
+    
+    def _current_generation(self, pointer: str) -> Optional[str]:
+        """Return the generation directory an entry's pointer names, or None if it is unusable."""
+        try:
+            with open(pointer) as f:
+                cache_dir = os.path.join(GIT_CACHE_DIR, f.read().strip())
+        except OSError:
+            return None
+        if not os.path.exists(os.path.join(cache_dir, "HEAD" if self.bare else ".git")):
+            return None
+        return cache_dir
+    
+    def _branch_moved(self, repo_dir: str, ref: Optional[str]) -> bool:
+        """Fetch ref into a cached clone and report whether it moved past the checked out commit.
+        
+        Only objects are added; the checkout itself is left alone. If the fetch fails,
+        for example when offline, the cached checkout is kept as it is.
+        """
+        try:
+            subprocess.run(["git", "-C", repo_dir, "fetch", "--depth", "1", "origin", ref or "HEAD"],
+                           check=True, capture_output=True, text=True)
+            result = subprocess.run(["git", "-C", repo_dir, "rev-parse", "HEAD", "FETCH_HEAD"],
+                                    check=True, capture_output=True, text=True)
+        except subprocess.CalledProcessError:
+            return False
+        head, fetched = result.stdout.split()
+        return head != fetched
+    
+    def _has_commit(self, repo_dir: str, ref: str) -> bool:
+        """Check that a cached clone holds commit ref: checked out, or for bare clones, present."""
+        if self.bare:
+            cmd = ["rev-parse", "--verify", "-q", f"{ref}^{{commit}}"]
+        else:
+            cmd = ["rev-parse", "HEAD"]
+        result = subprocess.run(["git", "-C", repo_dir, *cmd], capture_output=True, text=True)
+        return result.returncode == 0 and result.stdout.strip().lower() == ref.lower()
+    
+    def _clone(self, repo_url: str, ref: str, is_commit: bool, dest: str):
+        """Clone repo_url into dest and check out ref."""
+        # Fetching just the commit avoids cloning the full history
+        if is_commit and self._fetch_commit(repo_url, ref, dest):
+            return
         
         # Clone the repository
         clone_cmd = ["git", "clone"]
@@ -50,7 +230,14 @@ class GitRepoContext:
             if ref:
                 clone_cmd.extend(["-b", ref])
         
-        clone_cmd.extend([repo_url, self.tmp_dir])
+        if self.bare:
+            # Blobs are fetched on demand by read_blob
+            clone_cmd.extend(["--bare", "--filter=blob:none"])
+        elif self.target_path:
+            # Only the target path is read, so skip blobs and files outside of it
+            clone_cmd.extend(["--filter=blob:none", "--sparse"])
+        
+        clone_cmd.extend([repo_url, dest])
         try:
             subprocess.run(clone_cmd, check=True, capture_output=True, text=True)
         except subprocess.CalledProcessError as e:
@@ -66,40 +253,122 @@ class GitRepoContext:
         except FileNotFoundError:
             raise ValueError("Git is not installed or not in PATH")
         
+        if self.target_path and not self.bare:
+            self._sparse_checkout(dest)
+        
         # If we cloned for a specific commit, checkout that commit
-        if is_commit:
+        if is_commit and not self.bare:
             try:
-                subprocess.run(["git", "checkout", ref], cwd=self.tmp_dir, check=True, capture_output=True, text=True)
+                subprocess.run(["git", "checkout", ref], cwd=dest, check=True, capture_output=True, text=True)
             except subprocess.CalledProcessError as e:
                 raise ValueError(f"Failed to checkout commit {ref}: {e.stderr}")
+    
+    def _fetch_commit(self, repo_url: str, ref: str, dest: str) -> bool:
+        """Fetch a single commit with --depth 1 into a fresh repository at dest.
         
-        # Always return the repository root as working directory
-        # The target_path will be used by the caller to construct the full path
-        self.working_dir = self.tmp_dir
+        Returns False if the server refuses to serve an arbitrary commit, in
+        which case the caller falls back to a full clone.
+        """
+        init_cmd = ["git", "init", "-q"]
+        if self.bare:
+            init_cmd.append("--bare")
+        init_cmd.append(dest)
         
-        # Check if the target_path exists in the repository
-        if self.target_path:
-            target_full_path = os.path.join(self.tmp_dir, self.target_path)
-            if not os.path.exists(target_full_path):
-                # If it's a directory path (doesn't end with .sql), it should exist
-                if not self.target_path.endswith('.sql'):
-                    raise ValueError(f"Directory path '{self.target_path}' does not exist in repository")
-                # If it's a .sql file that doesn't exist, that's fine - it will be treated as new
+        fetch_cmd = ["git", "-C", dest, "fetch", "-q", "--depth", "1"]
+        if self.bare or self.target_path:
+            fetch_cmd.append("--filter=blob:none")
+        fetch_cmd.extend(["origin", ref])
         
-        return self.working_dir
+        try:
+            subprocess.run(init_cmd, check=True, capture_output=True, text=True)
+            subprocess.run(["git", "-C", dest, "remote", "add", "origin", repo_url],
+                           check=True, capture_output=True, text=True)
+            subprocess.run(fetch_cmd, check=True, capture_output=True, text=True)
+            if not self.bare:
+                if self.target_path:
+                    self._sparse_checkout(dest)
+                subprocess.run(["git", "-C", dest, "checkout", "-q", "FETCH_HEAD"],
+                               check=True, capture_output=True, text=True)
+        except subprocess.CalledProcessError:
+            shutil.rmtree(dest, ignore_errors=True)
+            return False
+        except FileNotFoundError:
+            raise ValueError("Git is not installed or not in PATH")
+        
+        return True
+    
+    def _sparse_checkout(self, dest: str):
+        """Limit the working tree at dest to the target path."""
+        try:
+            subprocess.run(["git", "-C", dest, "sparse-checkout", "set", "--no-cone",
+                            "/" + self.target_path.strip("/")],
+                           check=True, capture_output=True, text=True)
+        except subprocess.CalledProcessError:
+            # Older git versions may not support this, fall back to the full tree
+            subprocess.run(["git", "-C", dest, "sparse-checkout", "disable"], capture_output=True, text=True)
+    
+    def read_blob(self, path: str) -> Optional[str]:
+        """Read a file at the cloned ref without going through the working tree.
+        
+        A single ``git cat-file --batch`` process is kept open and reused for
+        every read. Returns None if the path does not exist at that ref.
+        """
+        # The batch protocol is line based, so a newline would be read as a second request
+        if "\n" in path:
+            raise ValueError(f"Invalid path {path!r}: paths cannot contain newlines")
+        
+        if self._cat_file is None:
+            self._cat_file = subprocess.Popen(["git", "cat-file", "--batch"], cwd=self.working_dir,
+                                              stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        
+        self._cat_file.stdin.write(f"{self._rev}:{path}\n".encode())
+        self._cat_file.stdin.flush()
+        
+        # Header is "<oid> <type> <size>", or "<name> missing" / "<name> ambiguous" with no
+        # body. The name may contain spaces, so check those replies before splitting.
+        line = self._cat_file.stdout.readline().rstrip()
+        if line.endswith((b" missing", b" ambiguous")):
+            return None
+        header = line.rsplit(b" ", 2)
+        if len(header) != 3:
+            return None
+        
+        size = int(header[2])
+        if header[1] != b"blob":
+            # A tree or commit body still follows; consume it so the next read starts at a header
+            self._cat_file.stdout.read(size + 1)
+            return None
+        
+        data = self._cat_file.stdout.read(size)
+        self._cat_file.stdout.read(1)  # trailing newline
+        return data.decode()
     
     def __exit__(self, exc_type, exc_val, exc_tb):
-        """Context manager exit - temp directory will be cleaned up by OS."""
-        pass
+        """Context manager exit - remove the temp directory (cached clones are kept)."""
+        if self._cat_file is not None:
+            self._cat_file.stdin.close()
+            self._cat_file.wait()
+            self._cat_file = None
+        
+        if self._generation_lock is not None:
+            self._generation_lock.close()
+            self._generation_lock = None
+        
+        if not self.use_cache and self.tmp_dir and os.path.isdir(self.tmp_dir):
+            _remove_tree(self.tmp_dir)
+            self.tmp_dir = None
 
-def extract_from_git_repo(repo_url: str, target_path: str = None) -> GitRepoContext:
+def extract_from_git_repo(repo_url: str, target_path: str = None, use_cache: bool = True,
+                          bare: bool = False) -> GitRepoContext:
     """Extract schema objects from a git repository by cloning to temp directory.
     
     Args:
         repo_url: Git URL in format git://url or git@url, optionally with #branch or #commit suffix
         target_path: Optional path to specific directory or file within the repository
+        use_cache: Reuse a cached clone under GIT_CACHE_DIR instead of cloning from scratch
+        bare: Make a bare, blobless clone; files are then read with GitRepoContext.read_blob
         
     Returns:
         GitRepoContext: A context manager that provides the working directory path
     """
-    return GitRepoContext(repo_url, target_path)
+    return GitRepoContext(repo_url, target_path, use_cache=use_cache, bare=bare)
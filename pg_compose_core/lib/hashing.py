@@ -0,0 +1,45 @@
+"""
+query_hash computation shared by the parser and by directly constructed ASTObjects.
+
+query_hash is a 128-bit blake2b digest of the normalized statement. It is stored
+and compared across installs, so the algorithm must not depend on the environment.
+"""
+
+import hashlib
+import re
+
+# Unkeyed, empty blake2b hasher that per-statement hashers are copied from
+_HASH_BASE = hashlib.blake2b(digest_size=16)
+
+# Patterns used by normalize_sql and its bytes counterpart
+_COMMENT_RE = re.compile(r'--[^\n]*')
+_COMMENT_RE_BYTES = re.compile(rb'--[^\n]*')
+
+def normalize_sql(sql: str) -> str:
+    """Normalize SQL for consistent hashing."""
+    # Remove comments (most statement slices have none, so skip the regex pass)
+    if "--" in sql:
+        sql = _COMMENT_RE.sub('', sql)
+    # Collapse whitespace runs and trim the ends in a single pass
+    return ' '.join(sql.split())
+
+def normalize_sql_bytes(sql: bytes) -> bytes:
+    """normalize_sql for ASCII SQL already encoded to bytes."""
+    if b"--" in sql:
+        sql = _COMMENT_RE_BYTES.sub(b'', sql)
+    return b' '.join(sql.split())
+
+def hash_sql(normalized_sql: str) -> str:
+    """Hash normalized SQL into a query_hash (an identity key, not a security digest)."""
+    return hash_sql_bytes(normalized_sql.encode())
+
+def hash_sql_bytes(normalized_sql: bytes) -> str:
+    """hash_sql for SQL that is already encoded."""
+    # Copying a configured hasher skips blake2b's constructor argument handling
+    h = _HASH_BASE.copy()
+    h.update(normalized_sql)
+    return h.hexdigest()
+
+def query_hash(sql: str) -> str:
+    """query_hash of a single SQL statement."""
+    return hash_sql(normalize_sql(sql))
@@ -3,59 +3,216 @@ Single entry point for SQL parsing using pglast.
 Consolidates all parsing logic from extract.py, catalog.py, compare.py, and diff.py.
 """
 
+import copy
 import hashlib
+import os
 import re
-from typing import List, Optional, Union, Dict, Any
+import threading
+from collections import OrderedDict
+from dataclasses import fields
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import chain
+from typing import List, Optional, Union, Dict, Any, Iterator, Tuple
 from pglast import parse_sql, parse_plpgsql
+from pglast.parser import split
+from pglast.ast import (
+    AlterTableStmt, ColumnDef, Constraint, CreateFunctionStmt, CreatePolicyStmt, CreateStmt,
+    DeleteStmt, GrantStmt, IndexStmt, InsertStmt, JoinExpr, Node, RangeVar, SelectStmt,
+    UpdateStmt, ViewStmt
+)
+from pglast.enums import AlterTableType, ConstrType, SQLValueFunctionOp
 from pg_compose_core.lib.ast.objects import ASTObject, BuildStage, ResourceType
 from pg_compose_core.lib.ast.function import FunctionASTObject, FunctionParameter
 from pg_compose_core.lib.ast.table import TableASTObject, TableColumn, TableConstraint
 from pg_compose_core.lib.ast.list import ASTList
+from pg_compose_core.lib.git import extract_from_git_repo
+from pg_compose_core.lib.hashing import hash_sql, hash_sql_bytes, normalize_sql, normalize_sql_bytes
 
 # Constants
-POSTGRES_BUILTINS = {
+POSTGRES_BUILTINS = frozenset({
     'information_schema', 'pg_catalog', 'pg_toast', 'pg_temp', 'pg_toast_temp'
+})
+# Everything in POSTGRES_BUILTINS except information_schema is covered by the prefix
+_PG_PREFIX = ('pg_',)
+_BUILTIN_EXACT = frozenset({'information_schema'})
+
+# Enum members used in per-object loops, bound once at import
+_RT_UNKNOWN = ResourceType.UNKNOWN
+_RT_TABLE = ResourceType.TABLE
+_RT_SCHEMA = ResourceType.SCHEMA
+_RT_FUNCTION = ResourceType.FUNCTION
+_BS_GRANT = BuildStage.GRANT
+_AT_ADD_CONSTRAINT = AlterTableType.AT_AddConstraint
+
+# SQL spellings of SQLValueFunction defaults (CURRENT_TIMESTAMP, ...)
+_SQL_VALUE_FUNCTIONS = {
+    SQLValueFunctionOp.SVFOP_CURRENT_TIMESTAMP: "CURRENT_TIMESTAMP",
+    SQLValueFunctionOp.SVFOP_CURRENT_DATE: "CURRENT_DATE",
+    SQLValueFunctionOp.SVFOP_CURRENT_TIME: "CURRENT_TIME",
+    SQLValueFunctionOp.SVFOP_LOCALTIME: "LOCALTIME",
+    SQLValueFunctionOp.SVFOP_LOCALTIMESTAMP: "LOCALTIMESTAMP",
+    SQLValueFunctionOp.SVFOP_CURRENT_ROLE: "CURRENT_ROLE",
+    SQLValueFunctionOp.SVFOP_CURRENT_USER: "CURRENT_USER",
+    SQLValueFunctionOp.SVFOP_USER: "USER",
+    SQLValueFunctionOp.SVFOP_SESSION_USER: "SESSION_USER",
+    SQLValueFunctionOp.SVFOP_CURRENT_CATALOG: "CURRENT_CATALOG",
+    SQLValueFunctionOp.SVFOP_CURRENT_SCHEMA: "CURRENT_SCHEMA",
 }
 
-def normalize_sql(sql: str) -> str:
-    """Normalize SQL for consistent hashing."""
-    # Remove comments
-    sql = re.sub(r'--.*$', '', sql, flags=re.MULTILINE)
-    # Remove extra whitespace
-    sql = re.sub(r'\s+', ' ', sql)
-    return sql.strip()
+# Used by load_source to recognize raw SQL strings
+_SQL_KW_RE = re.compile(r'\b(?:CREATE|DROP|ALTER|GRANT|REVOKE|SELECT|INSERT|UPDATE|DELETE)\b', re.IGNORECASE)
+
+# TableConstraint.constraint_type labels by pglast constraint type
+_CONSTRAINT_TYPE_NAMES = {
+    ConstrType.CONSTR_NOTNULL: "NOT NULL",
+    ConstrType.CONSTR_FOREIGN: "FOREIGN KEY",
+    ConstrType.CONSTR_PRIMARY: "PRIMARY KEY",
+    ConstrType.CONSTR_UNIQUE: "UNIQUE",
+    ConstrType.CONSTR_CHECK: "CHECK",
+    ConstrType.CONSTR_EXCLUSION: "EXCLUSION",
+}
+
+# PLpgSQL_expr parse modes (RawParseMode): whole statements, and the first
+# of the assignment modes whose text is "target := expr"
+_PLPGSQL_MODE_DEFAULT = 0
+_PLPGSQL_MODE_ASSIGN = 3
+
+# Table references in PL/pgSQL statement text
+_FROM_RE = re.compile(r'\bFROM\s+([a-zA-Z_][a-zA-Z0-9_]*\.?[a-zA-Z_][a-zA-Z0-9_]*)\b', re.IGNORECASE)
+
+# ASCII characters str.split() treats as whitespace but bytes.split() does not
+_STR_ONLY_WS_RE = re.compile(r'[\x1c-\x1f]')
+
+# Inputs smaller than this (in characters) are always parsed in-process
+PARALLEL_PARSE_THRESHOLD = 256 * 1024
+
+# Parsed results keyed by (SQL digest, grants), most recently used last.
+# Entries are never handed out directly; callers get copies (see _copy_cached).
+PARSE_CACHE_SIZE = 256
+_PARSE_CACHE: "OrderedDict[tuple, List[ASTObject]]" = OrderedDict()
+_PARSE_CACHE_LOCK = threading.Lock()
+
+# Function/procedure body dependencies keyed by (body digest, PL/pgSQL flag), most recently used last
+DEPS_CACHE_SIZE = 2048
+_DEPS_CACHE: "OrderedDict[tuple, Tuple[str, ...]]" = OrderedDict()
+_DEPS_CACHE_LOCK = threading.Lock()
+# Body prefixes that can only be PL/pgSQL, never plain SQL
+_PLPGSQL_PREFIXES = ("BEGIN", "DECLARE", "<<")
+
+def _push_dep(dependencies: List[str], name: str) -> None:
+    """Append an already-lowercased dependency unless it is a builtin schema or pg_* object."""
+    if name not in _BUILTIN_EXACT and not name.startswith(_PG_PREFIX):
+        dependencies.append(name)
 
 def extract_schema_info(rel_node) -> tuple[Optional[str], Optional[str]]:
     """Extract schema and table name from a relation node."""
     if not rel_node:
         return None, None
     
-    schema = None
-    table_name = None
-    
-    if hasattr(rel_node, "schemaname") and rel_node.schemaname:
-        schema = rel_node.schemaname.lower()
-    
-    if hasattr(rel_node, "relname") and rel_node.relname:
-        table_name = rel_node.relname.lower()
-    
-    return schema, table_name
+    schema = getattr(rel_node, "schemaname", None)
+    table_name = getattr(rel_node, "relname", None)
+    return (schema.lower() if schema else None,
+            table_name.lower() if table_name else None)
 
-def extract_qualified_name(rel_node) -> str:
+def extract_qualified_name(rel_node) -> Optional[str]:
     """Extract fully qualified name (schema.table) from a relation node."""
-    schema, table_name = extract_schema_info(rel_node)
-    if schema and table_name:
-        return f"{schema}.{table_name}"
-    elif table_name:
-        return table_name
-    else:
+    table_name = getattr(rel_node, "relname", None)
+    if not table_name:
         return None
+    schema = getattr(rel_node, "schemaname", None)
+    if schema:
+        return f"{schema.lower()}.{table_name.lower()}"
+    return table_name.lower()
 
-def parse_sql_to_ast_objects(sql: str, grants: bool = True) -> ASTList:
+def parse_sql_to_ast_objects(sql: str, grants: bool = True, workers: int = 1) -> ASTList:
     """
     Parse SQL string and return ASTList of ASTObjects.
     This is the single entry point for all SQL parsing.
+
+    When workers > 1 and the input is larger than PARALLEL_PARSE_THRESHOLD,
+    statements are split into batches and parsed in a process pool.
+    workers=0 uses one worker per CPU.
+
+    Results are cached by SQL content, so parsing the same text again
+    skips the parser. Every call returns its own copies of the objects.
+    """
+    key = _parse_cache_key(sql, grants)
+    ast_objects = _parse_cache_get(key)
+    if ast_objects is None:
+        if workers == 0:
+            workers = os.cpu_count() or 1
+        if workers > 1 and len(sql) > PARALLEL_PARSE_THRESHOLD:
+            ast_objects = _parse_sql_parallel(sql, grants, workers)
+        else:
+            ast_objects = _parse_sql_batch(sql, grants)
+        _parse_cache_put(key, ast_objects)
+    
+    return ASTList([_copy_cached(obj) for obj in ast_objects])
+
+def _parse_cache_key(sql: str, grants: bool) -> tuple:
+    return (hashlib.blake2b(sql.encode()).digest(), grants)
+
+def _parse_cache_get(key: tuple) -> Optional[List[ASTObject]]:
+    with _PARSE_CACHE_LOCK:
+        cached = _PARSE_CACHE.get(key)
+        if cached is not None:
+            _PARSE_CACHE.move_to_end(key)
+        return cached
+
+def _parse_cache_put(key: tuple, ast_objects: List[ASTObject]) -> None:
+    with _PARSE_CACHE_LOCK:
+        _PARSE_CACHE[key] = ast_objects
+        if len(_PARSE_CACHE) > PARSE_CACHE_SIZE:
+            _PARSE_CACHE.popitem(last=False)
+
+def _copy_cached(ast_obj: ASTObject) -> ASTObject:
     """
+    Copy a cached object so callers can modify it without affecting later parses.
+    The pglast node is shared rather than copied; it is kept for debugging only.
+    """
+    return copy.deepcopy(ast_obj, {id(ast_obj.ast_node): ast_obj.ast_node})
+
+def clear_parse_cache() -> None:
+    """Drop all cached parse results, e.g. after SQL files were edited in place."""
+    with _PARSE_CACHE_LOCK:
+        _PARSE_CACHE.clear()
+    with _DEPS_CACHE_LOCK:
+        _DEPS_CACHE.clear()
+
+def _parse_sql_parallel(sql: str, grants: bool, workers: int) -> List[ASTObject]:
+    """Split SQL on statement boundaries and parse batches in worker processes."""
+    # Use the parser rather than the scanner for boundaries: the scanner splits on
+    # every ';', including those inside BEGIN ATOMIC ... END function bodies
+    try:
+        slices = split(sql, with_parser=True, only_slices=True)
+    except Exception:
+        # Let the regular parser report the error
+        return _parse_sql_batch(sql, grants)
+    
+    batch_count = min(len(slices), workers * 4)
+    if batch_count < 2:
+        return _parse_sql_batch(sql, grants)
+    
+    # Batch boundaries sit at statement starts so that trailing semicolons
+    # and comments stay with the preceding statement
+    batch_size = -(-len(slices) // batch_count)
+    bounds = [0] + [slices[i].start for i in range(batch_size, len(slices), batch_size)] + [len(sql)]
+    chunks = [sql[bounds[i]:bounds[i + 1]] for i in range(len(bounds) - 1)]
+    offsets = bounds[:-1]
+    
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        batches = executor.map(_parse_sql_batch, chunks, [grants] * len(chunks), offsets)
+        return list(chain.from_iterable(batches))
+
+def _parse_sql_batch(sql: str, grants: bool = True, offset: int = 0) -> List[ASTObject]:
+    """
+    Parse a chunk of SQL into ASTObjects.
+    Positions are shifted by offset so they refer to the enclosing SQL text.
+    """
+    return list(_iter_sql_objects(sql, grants, offset))
+
+def _iter_sql_objects(sql: str, grants: bool = True, offset: int = 0) -> Iterator[ASTObject]:
+    """Parse SQL and yield ASTObjects one statement at a time."""
     try:
         raw_stmts = parse_sql(sql)
     except Exception as e:
@@ -64,13 +221,22 @@ def parse_sql_to_ast_objects(sql: str, grants: bool = True) -> ASTList:
             raw_stmts = parse_plpgsql(sql)
         except Exception as plpgsql_e:
             # If both fail, rethrow the original exception
-            raise ValueError(f"Failed to parse SQL: {str(e)}")
+            raise ValueError(_format_parse_error(sql, e))
     
-    ast_objects = []
+    # For ASCII input, encode once and normalize/hash byte slices directly,
+    # avoiding a str slice + encode per statement
+    sql_bytes = None
+    if sql.isascii() and not _STR_ONLY_WS_RE.search(sql):
+        sql_bytes = sql.encode()
     
+    dispatch = _STMT_DISPATCH if grants else _STMT_DISPATCH_NO_GRANTS
     for raw_stmt in raw_stmts:
         node = raw_stmt.stmt
-        typename = type(node).__name__
+        handler = dispatch.get(type(node))
+        
+        # Statements we don't turn into objects don't need slicing or hashing
+        if handler is None:
+            continue
         
         # Extract SQL slice and create normalized hash
         start = raw_stmt.stmt_location
@@ -81,130 +247,101 @@ def parse_sql_to_ast_objects(sql: str, grants: bool = True) -> ASTList:
         if end < len(sql) and sql[end] == ';':
             end += 1
         
-        query_text = sql[start:end]
-        normalized_sql = normalize_sql(query_text)
-        query_hash = hashlib.sha256(normalized_sql.encode()).hexdigest()
-        
-        # Parse based on statement type
-        if typename == "CreateStmt":
-            ast_obj = _parse_create_statement(node, query_text, query_hash, start, end)
-            if ast_obj:
-                ast_objects.append(ast_obj)
-        
-        elif typename == "IndexStmt":
-            ast_obj = _parse_index_statement(node, query_text, query_hash, start, end)
-            if ast_obj:
-                ast_objects.append(ast_obj)
-        
-        elif typename == "AlterTableStmt":
-            ast_obj = _parse_alter_table_statement(node, query_text, query_hash, start, end)
-            if ast_obj:
-                ast_objects.append(ast_obj)
-        
-        elif typename == "CreatePolicyStmt":
-            ast_obj = _parse_policy_statement(node, query_text, query_hash, start, end)
-            if ast_obj:
-                ast_objects.append(ast_obj)
-        
-        elif typename == "GrantStmt" and grants:
-            ast_objs = _parse_grant_statement(node, query_text, query_hash, start, end)
-            ast_objects.extend(ast_objs)
-        
-        elif typename == "ViewStmt":
-            ast_obj = _parse_view_statement(node, query_text, query_hash, start, end)
-            if ast_obj:
-                ast_objects.append(ast_obj)
-        
-        elif typename == "CreateFunctionStmt":
-            # Check if this is actually a procedure
-            is_procedure = getattr(node, "is_procedure", False)
-            if is_procedure:
-                ast_obj = _parse_procedure_statement(node, query_text, query_hash, start, end)
-            else:
-                ast_obj = _parse_function_statement(node, query_text, query_hash, start, end)
-            if ast_obj:
-                ast_objects.append(ast_obj)
+        if sql_bytes is not None:
+            # One byte slice serves both the hash and the command text
+            raw_slice = sql_bytes[start:end]
+            query_text = raw_slice.decode('ascii')
+            query_hash = hash_sql_bytes(normalize_sql_bytes(raw_slice))
+        else:
+            query_text = sql[start:end]
+            query_hash = hash_sql(normalize_sql(query_text))
         
+        for ast_obj in handler(node, query_text, query_hash, start, end):
+            yield _shift_positions(ast_obj, offset)
 
-        
-        # Add more statement types as needed...
-    
-    return ASTList(ast_objects)
+def _shift_positions(ast_obj: ASTObject, offset: int) -> ASTObject:
+    """Shift query positions of an object parsed from a chunk of a larger SQL text."""
+    if offset:
+        ast_obj.query_start_pos += offset
+        ast_obj.query_end_pos += offset
+    return ast_obj
 
-def _parse_create_statement(node, query_text: str, query_hash: str, start: int, end: int) -> Optional[ASTObject]:
+def _format_parse_error(sql: str, error: Exception) -> str:
+    """Build a parse error message with the first lines of the offending SQL."""
+    lines = sql.strip().splitlines()
+    parts = [f"Failed to parse SQL: {error}", "First 10 lines of SQL:"]
+    parts.extend(f"{i:2d}: {line}" for i, line in enumerate(lines[:10], 1))
+    if len(lines) > 10:
+        parts.append(f"... and {len(lines) - 10} more lines")
+    return "\n".join(parts)
+
+def _parse_create_statement(node, query_text: str, query_hash: str, start: int, end: int) -> List[ASTObject]:
     """Parse CREATE TABLE, CREATE VIEW, etc. statements."""
     rel = getattr(node, "relation", None)
     if not rel:
-        return None
+        return []
     
     schema, table_name = extract_schema_info(rel)
     
+    table_elts = getattr(node, "tableElts", None)
+    
     # Determine object type
-    if hasattr(node, "tableElts") and node.tableElts:
+    if table_elts:
         query_type = BuildStage.BASE_TABLE
     elif hasattr(node, "viewQuery"):
         query_type = BuildStage.VIEW
     else:
         query_type = BuildStage.UNKNOWN
     
-    # Extract dependencies
     dependencies = []
-    if hasattr(node, "tableElts") and node.tableElts:
-        for elt in node.tableElts:
-            if hasattr(elt, "constraint") and elt.constraint:
-                constraint = elt.constraint
-                if hasattr(constraint, "contype") and constraint.contype == 2:  # FOREIGN KEY
-                    if hasattr(constraint, "pktable") and constraint.pktable:
-                        pk_schema, pk_table = extract_schema_info(constraint.pktable)
-                        if pk_table:
-                            dep_name = f"{pk_schema}.{pk_table}" if pk_schema else pk_table
-                            dependencies.append(dep_name)
     
     # For tables, create TableASTObject with column and constraint information
     if query_type == BuildStage.BASE_TABLE:
         columns = []
         constraints = []
         
-        if hasattr(node, "tableElts") and node.tableElts:
-            for elt in node.tableElts:
-                if hasattr(elt, "colname") and hasattr(elt, "typeName"):
-                    # This is a column definition
-                    col_name = str(elt.colname)
-                    col_type = _extract_full_type_name(elt.typeName)
-                    is_nullable = not getattr(elt, "is_not_null", False)
-                    default = None
-                    
-                    # Check for default value in constraints
-                    if hasattr(elt, "constraints") and elt.constraints:
-                        for constraint in elt.constraints:
-                            if hasattr(constraint, "contype"):
-                                from pglast.enums import ConstrType
-                                if constraint.contype == ConstrType.CONSTR_DEFAULT:
-                                    if hasattr(constraint, "raw_expr"):
-                                        default = _extract_default_value(constraint.raw_expr)
-                                    break
-                    
-                    columns.append(TableColumn(
-                        name=col_name,
-                        data_type=col_type,
-                        is_nullable=is_nullable,
-                        default=default
-                    ))
+        # Single pass over the table elements: columns, table-level
+        # constraints, and the dependencies those constraints imply
+        for elt in table_elts:
+            elt_cls = type(elt)
+            if elt_cls is ColumnDef:
+                # This is a column definition
+                col_name = elt.colname
+                col_type = _extract_full_type_name(elt.typeName)
+                is_nullable = not getattr(elt, "is_not_null", False)
+                default = None
                 
-                elif hasattr(elt, "constraint") and elt.constraint:
-                    # This is a table-level constraint
-                    constraint = elt.constraint
-                    constraint_name = getattr(constraint, "conname", None)
-                    constraint_type = _get_constraint_type(constraint)
-                    constraint_columns = _extract_constraint_columns(constraint)
-                    
-                    constraints.append(TableConstraint(
-                        name=constraint_name,
-                        constraint_type=constraint_type,
-                        columns=constraint_columns
-                    ))
+                # Check for default value in constraints
+                col_constraints = getattr(elt, "constraints", None)
+                if col_constraints:
+                    for constraint in col_constraints:
+                        if getattr(constraint, "contype", None) == ConstrType.CONSTR_DEFAULT:
+                            if hasattr(constraint, "raw_expr"):
+                                default = _extract_default_value(constraint.raw_expr)
+                            break
+                
+                columns.append(TableColumn(
+                    name=col_name,
+                    data_type=col_type,
+                    is_nullable=is_nullable,
+                    default=default
+                ))
+            
+            elif elt_cls is Constraint:
+                # This is a table-level constraint
+                if elt.contype == ConstrType.CONSTR_FOREIGN and elt.pktable:
+                    # FOREIGN KEY constraints depend on the referenced table
+                    pk_schema, pk_table = extract_schema_info(elt.pktable)
+                    if pk_table:
+                        dependencies.append(f"{pk_schema}.{pk_table}" if pk_schema else pk_table)
+                
+                constraints.append(TableConstraint(
+                    name=elt.conname,
+                    constraint_type=_get_constraint_type(elt),
+                    columns=_extract_constraint_columns(elt)
+                ))
         
-        return TableASTObject(
+        return [TableASTObject(
             command=query_text,
             object_name=table_name,
             dependencies=dependencies,
@@ -215,10 +352,10 @@ def _parse_create_statement(node, query_text: str, query_hash: str, start: int,
             ast_node=node,
             columns=columns,
             constraints=constraints
-        )
+        )]
     
     # For non-table objects, return regular ASTObject
-    return ASTObject(
+    return [ASTObject(
         command=query_text,
         object_name=table_name,
         query_type=query_type,
@@ -228,15 +365,15 @@ def _parse_create_statement(node, query_text: str, query_hash: str, start: int,
         query_end_pos=end,
         schema=schema,
         ast_node=node
-    )
+    )]
 
-def _parse_index_statement(node, query_text: str, query_hash: str, start: int, end: int) -> Optional[ASTObject]:
+def _parse_index_statement(node, query_text: str, query_hash: str, start: int, end: int) -> List[ASTObject]:
     """Parse CREATE INDEX statements."""
     index_name = getattr(node, "idxname", None)
     rel = getattr(node, "relation", None)
     
     if not rel or not index_name:
-        return None
+        return []
     
     schema, table_name = extract_schema_info(rel)
     dependencies = []
@@ -245,7 +382,7 @@ def _parse_index_statement(node, query_text: str, query_hash: str, start: int, e
         dep_name = f"{schema}.{table_name}" if schema else table_name
         dependencies.append(dep_name)
     
-    return ASTObject(
+    return [ASTObject(
         command=query_text,
         object_name=index_name,
         query_type=BuildStage.INDEX,
@@ -255,24 +392,23 @@ def _parse_index_statement(node, query_text: str, query_hash: str, start: int, e
         query_end_pos=end,
         schema=schema,
         ast_node=node
-    )
+    )]
 
-def _parse_alter_table_statement(node, query_text: str, query_hash: str, start: int, end: int) -> Optional[ASTObject]:
+def _parse_alter_table_statement(node, query_text: str, query_hash: str, start: int, end: int) -> List[ASTObject]:
     """Parse ALTER TABLE statements (constraints, etc.)."""
-    from pglast.enums import AlterTableType
     rel = getattr(node, "relation", None)
     if not rel:
-        return None
+        return []
     
     schema, table_name = extract_schema_info(rel)
     
     # Determine if this is a constraint
     cmds = getattr(node, "cmds", [])
     for cmd in cmds:
-        if hasattr(cmd, "subtype") and cmd.subtype == AlterTableType.AT_AddConstraint:
+        if getattr(cmd, "subtype", None) == _AT_ADD_CONSTRAINT:
             constraint = cmd.def_
             if hasattr(constraint, "conname"):
-                return ASTObject(
+                return [ASTObject(
                     command=query_text,
                     object_name=constraint.conname,
                     query_type=BuildStage.CONSTRAINT,
@@ -282,17 +418,17 @@ def _parse_alter_table_statement(node, query_text: str, query_hash: str, start:
                     query_end_pos=end,
                     schema=schema,
                     ast_node=node
-                )
+                )]
     
-    return None
+    return []
 
-def _parse_policy_statement(node, query_text: str, query_hash: str, start: int, end: int) -> Optional[ASTObject]:
+def _parse_policy_statement(node, query_text: str, query_hash: str, start: int, end: int) -> List[ASTObject]:
     """Parse CREATE POLICY statements."""
     rel = getattr(node, "table", None)
     policy_name = getattr(node, "policy_name", None)
     
     if not rel or not policy_name:
-        return None
+        return []
     
     schema, table_name = extract_schema_info(rel)
     dependencies = []
@@ -301,7 +437,7 @@ def _parse_policy_statement(node, query_text: str, query_hash: str, start: int,
         dep_name = f"{schema}.{table_name}" if schema else table_name
         dependencies.append(dep_name)
     
-    return ASTObject(
+    return [ASTObject(
         command=query_text,
         object_name=policy_name,
         query_type=BuildStage.POLICY,
@@ -311,30 +447,30 @@ def _parse_policy_statement(node, query_text: str, query_hash: str, start: int,
         query_end_pos=end,
         schema=schema,
         ast_node=node
-    )
+    )]
 
 def _parse_grant_statement(node, query_text: str, query_hash: str, start: int, end: int) -> List[ASTObject]:
     """Parse GRANT statements."""
-    from pg_compose_core.lib.ast import ResourceType
-    
     ast_objects = []
     objs = getattr(node, "objects", []) or []
     
     # Extract privileges and grantees from the grant statement
     privileges = []
-    if hasattr(node, "privileges") and node.privileges:
-        for priv in node.privileges:
+    node_privileges = getattr(node, "privileges", None)
+    if node_privileges:
+        for priv in node_privileges:
             if hasattr(priv, "priv_name"):
                 # Preserve original case by converting to uppercase
-                privileges.append(str(priv.priv_name).upper())
+                privileges.append(priv.priv_name.upper())
     
     grantees = []
-    if hasattr(node, "grantees") and node.grantees:
-        for grantee in node.grantees:
+    node_grantees = getattr(node, "grantees", None)
+    if node_grantees:
+        for grantee in node_grantees:
             if hasattr(grantee, "rolename"):
                 grantees.append(str(grantee.rolename))
             elif hasattr(grantee, "sval"):
-                grantees.append(str(grantee.sval))
+                grantees.append(grantee.sval)
     
     # Create a unique identifier for this grant statement
     privilege_str = "_".join(privileges) if privileges else "ALL"
@@ -344,45 +480,37 @@ def _parse_grant_statement(node, query_text: str, query_hash: str, start: int, e
         dependencies = []
         object_name = None
         schema = None
-        resource_type = ResourceType.UNKNOWN
+        resource_type = _RT_UNKNOWN
         
         # Handle different object types in GRANT statements
-        if hasattr(obj, "schemaname") and hasattr(obj, "relname") and obj.schemaname and obj.relname:
-            schema = obj.schemaname.lower()
-            table_name = obj.relname.lower()
+        relname = getattr(obj, "relname", None)
+        schemaname = getattr(obj, "schemaname", None) if relname else None
+        if schemaname and relname:
+            schema = schemaname.lower()
+            table_name = relname.lower()
             object_name = table_name
             qualified_name = f"{schema}.{table_name}"
-            dependencies.append(qualified_name)
-            resource_type = ResourceType.TABLE
-        elif hasattr(obj, "relname") and obj.relname:
-            table_name = obj.relname.lower()
+            _push_dep(dependencies, qualified_name)
+            resource_type = _RT_TABLE
+        elif relname:
+            table_name = relname.lower()
             object_name = table_name
-            dependencies.append(table_name)
-            resource_type = ResourceType.TABLE
-        elif hasattr(obj, "names") and obj.names:
-            qualified_name = ".".join(str(n.sval).lower() for n in obj.names)
+            _push_dep(dependencies, table_name)
+            resource_type = _RT_TABLE
+        elif getattr(obj, "names", None):
+            qualified_name = ".".join(n.sval.lower() for n in obj.names)
             object_name = qualified_name
-            dependencies.append(qualified_name)
-            resource_type = ResourceType.SCHEMA
-        elif hasattr(obj, "objname") and obj.objname:
-            if len(obj.objname) > 1:
-                func_name = str(obj.objname[-1].sval).lower()
-                object_name = func_name
-                dependencies.append(func_name)
-            else:
-                func_name = str(obj.objname[0].sval).lower()
-                object_name = func_name
-                dependencies.append(func_name)
-            resource_type = ResourceType.FUNCTION
+            _push_dep(dependencies, qualified_name)
+            resource_type = _RT_SCHEMA
+        elif getattr(obj, "objname", None):
+            # The last name part is the function name, qualified or not
+            func_name = obj.objname[-1].sval.lower()
+            object_name = func_name
+            _push_dep(dependencies, func_name)
+            resource_type = _RT_FUNCTION
         else:
             object_name = "unknown_resource"
         
-        # Clean up dependency list
-        filtered_deps = [
-            d for d in dependencies
-            if d not in POSTGRES_BUILTINS and not d.startswith("pg_")
-        ]
-        
         # Create separate grant objects for each privilege
         for privilege in privileges:
             # Create a unique object name that includes privileges and grantees
@@ -390,14 +518,14 @@ def _parse_grant_statement(node, query_text: str, query_hash: str, start: int, e
             
             # Create a unique query hash for this specific grant
             unique_grant_text = f"GRANT {privilege} ON {object_name} TO {grantee_str};"
-            unique_query_hash = hashlib.sha256(normalize_sql(unique_grant_text).encode()).hexdigest()
+            unique_query_hash = hash_sql(normalize_sql(unique_grant_text))
             
             ast_objects.append(ASTObject(
                 command=query_text,
                 object_name=unique_object_name,
-                query_type=BuildStage.GRANT,
+                query_type=_BS_GRANT,
                 resource_type=resource_type,
-                dependencies=filtered_deps,
+                dependencies=dependencies,
                 query_hash=unique_query_hash,
                 query_start_pos=start,
                 query_end_pos=end,
@@ -407,11 +535,11 @@ def _parse_grant_statement(node, query_text: str, query_hash: str, start: int, e
     
     return ast_objects
 
-def _parse_view_statement(node, query_text: str, query_hash: str, start: int, end: int) -> Optional[ASTObject]:
+def _parse_view_statement(node, query_text: str, query_hash: str, start: int, end: int) -> List[ASTObject]:
     """Parse CREATE VIEW statements."""
     rel = getattr(node, "view", None)
     if not rel:
-        return None
+        return []
     
     schema, view_name = extract_schema_info(rel)
     
@@ -423,7 +551,7 @@ def _parse_view_statement(node, query_text: str, query_hash: str, start: int, en
         # In practice, you'd want to parse the view query to find table references
         pass
     
-    return ASTObject(
+    return [ASTObject(
         command=query_text,
         object_name=view_name,
         query_type=BuildStage.VIEW,
@@ -433,30 +561,40 @@ def _parse_view_statement(node, query_text: str, query_hash: str, start: int, en
         query_end_pos=end,
         schema=schema,
         ast_node=node
-    )
+    )]
 
-def _parse_function_statement(node, query_text: str, query_hash: str, start: int, end: int) -> Optional[ASTObject]:
-    """Parse CREATE FUNCTION statements including PL/pgSQL functions."""
-    func_name = None
+def _option_str(value) -> str:
+    """Return a DefElem argument as a string, preferring the String node's sval."""
+    sval = getattr(value, "sval", None)
+    return sval if sval is not None else str(value)
+
+def _parse_routine_common(node, query_text: str, query_hash: str, start: int, end: int) -> Optional[Dict[str, Any]]:
+    """
+    Extract the fields CREATE FUNCTION and CREATE PROCEDURE share.
+    Returns FunctionASTObject keyword arguments, or None if the routine has no name.
+    """
+    routine_name = None
     schema = None
     
-    # Extract function name and schema
-    if hasattr(node, "funcname") and node.funcname:
-        if len(node.funcname) > 1:
-            # Function has schema qualification
-            schema = str(node.funcname[0].sval).lower()
-            func_name = str(node.funcname[-1].sval).lower()
+    # Extract routine name and schema
+    funcname = getattr(node, "funcname", None)
+    if funcname:
+        if len(funcname) > 1:
+            # Routine has schema qualification
+            schema = funcname[0].sval.lower()
+            routine_name = funcname[-1].sval.lower()
         else:
-            # Function without schema (uses search_path)
-            func_name = str(node.funcname[0].sval).lower()
+            # Routine without schema (uses search_path)
+            routine_name = funcname[0].sval.lower()
     
-    if not func_name:
+    if not routine_name:
         return None
     
-    # Extract function parameters
+    # Extract routine parameters
     parameters = []
-    if hasattr(node, "parameters") and node.parameters:
-        for param in node.parameters:
+    params = getattr(node, "parameters", None)
+    if params:
+        for param in params:
             param_name = getattr(param, "name", None)
             param_type = getattr(param, "argType", None)
             param_mode = getattr(param, "mode", None)
@@ -496,18 +634,13 @@ def _parse_function_statement(node, query_text: str, query_hash: str, start: int
                         mode_str = str(param_mode)
                 
                 parameters.append(FunctionParameter(
-                    name=str(param_name),  # param_name is already a string
+                    name=param_name,
                     data_type=type_name,
                     mode=mode_str,
-                    default_value=str(param_default) if param_default else None
+                    default_value=_extract_default_value(param_default) if param_default else None
                 ))
     
-    # Extract return type
-    return_type = None
-    if hasattr(node, "returnType") and node.returnType:
-        return_type = _extract_full_type_name(node.returnType)
-    
-    # Extract function options (language, volatility, etc.)
+    # Extract routine options (language, volatility, etc.)
     language = None
     volatility = None
     security = None
@@ -516,49 +649,47 @@ def _parse_function_statement(node, query_text: str, query_hash: str, start: int
     is_leakproof = False
     parallel = None
     
-    if hasattr(node, "options") and node.options:
-        for option in node.options:
-            if hasattr(option, "defname"):
-                option_name = option.defname
-                option_value = getattr(option, "arg", None)
-                
-                if option_name == "language":
-                    language = str(option_value.sval) if hasattr(option_value, "sval") else str(option_value)
-                elif option_name == "volatility":
-                    volatility = str(option_value.sval) if hasattr(option_value, "sval") else str(option_value)
-                elif option_name == "security":
-                    security = str(option_value.sval) if hasattr(option_value, "sval") else str(option_value)
-                elif option_name == "parallel":
-                    parallel = str(option_value.sval) if hasattr(option_value, "sval") else str(option_value)
-                elif option_name == "leakproof":
-                    is_leakproof = True
-                elif option_name == "aggregate":
-                    is_aggregate = True
-                elif option_name == "window":
-                    is_window = True
-    
-    # Extract dependencies from function body
+    body = None
+    options = getattr(node, "options", None)
+    if options:
+        for option in options:
+            option_name = getattr(option, "defname", None)
+            if option_name is None:
+                continue
+            option_value = getattr(option, "arg", None)
+            
+            if option_name == "as":
+                # Get routine body
+                if option_value:
+                    sval = getattr(option_value, "sval", None)
+                    if sval is not None:
+                        body = sval
+                    elif isinstance(option_value, (list, tuple)):
+                        # Handle list of strings (multi-line routine body)
+                        body = " ".join(arg.sval for arg in option_value if hasattr(arg, "sval"))
+            elif option_name == "language":
+                language = _option_str(option_value)
+            elif option_name == "volatility":
+                volatility = _option_str(option_value)
+            elif option_name == "security":
+                security = _option_str(option_value)
+            elif option_name == "parallel":
+                parallel = _option_str(option_value)
+            elif option_name == "leakproof":
+                is_leakproof = True
+            elif option_name == "aggregate":
+                is_aggregate = True
+            elif option_name == "window":
+                is_window = True
+    
+    # Extract table dependencies from the routine body using proper SQL parsing
     dependencies = []
+    if body:
+        dependencies = list(_extract_function_dependencies_with_parser(body, language, query_text))
     
-    # Get function body
-    func_body = None
-    if hasattr(node, "options") and node.options:
-        for option in node.options:
-            if hasattr(option, "defname") and option.defname == "as":
-                if hasattr(option, "arg") and option.arg:
-                    if hasattr(option.arg, "sval"):
-                        func_body = option.arg.sval
-                    elif isinstance(option.arg, list):
-                        # Handle list of strings (multi-line function body)
-                        func_body = " ".join(str(arg.sval) for arg in option.arg if hasattr(arg, "sval"))
-    
-    # Extract table dependencies from function body using proper SQL parsing
-    if func_body:
-        dependencies = _extract_function_dependencies_with_parser(func_body)
-    
-    return FunctionASTObject(
+    return dict(
         command=query_text,
-        object_name=func_name,
+        object_name=routine_name,
         dependencies=dependencies,
         query_hash=query_hash,
         query_start_pos=start,
@@ -566,7 +697,6 @@ def _parse_function_statement(node, query_text: str, query_hash: str, start: int
         schema=schema,
         ast_node=node,
         parameters=parameters,
-        return_type=return_type,
         language=language,
         volatility=volatility,
         security=security,
@@ -574,161 +704,90 @@ def _parse_function_statement(node, query_text: str, query_hash: str, start: int
         is_window=is_window,
         is_leakproof=is_leakproof,
         parallel=parallel,
-        function_body=func_body
+        function_body=body
     )
 
-def _parse_procedure_statement(node, query_text: str, query_hash: str, start: int, end: int) -> Optional[ASTObject]:
-    """Parse CREATE PROCEDURE statements."""
-    proc_name = None
-    schema = None
-    
-    # Extract procedure name and schema
-    if hasattr(node, "funcname") and node.funcname:
-        if len(node.funcname) > 1:
-            # Procedure has schema qualification
-            schema = str(node.funcname[0].sval).lower()
-            proc_name = str(node.funcname[-1].sval).lower()
-        else:
-            # Procedure without schema (uses search_path)
-            proc_name = str(node.funcname[0].sval).lower()
-    
-    if not proc_name:
-        return None
-    
-    # Extract procedure parameters (same as functions)
-    parameters = []
-    if hasattr(node, "parameters") and node.parameters:
-        for param in node.parameters:
-            param_name = getattr(param, "name", None)
-            param_type = getattr(param, "argType", None)
-            param_mode = getattr(param, "mode", None)
-            param_default = getattr(param, "defexpr", None)
-            
-            if param_name and param_type:
-                # Skip table columns (parameters with mode 't' are TABLE return columns)
-                if param_mode is not None:
-                    mode_value = None
-                    if hasattr(param_mode, 'value'):
-                        mode_value = param_mode.value
-                    elif hasattr(param_mode, 'name'):
-                        mode_value = param_mode.name
-                    else:
-                        mode_value = str(param_mode)
-                    
-                    # Skip table columns (mode 't')
-                    if mode_value == 't':
-                        continue
-                
-                # Extract full type information including precision/scale
-                type_name = _extract_full_type_name(param_type)
-                
-                # Convert parameter mode to string representation
-                mode_str = None
-                if param_mode is not None:
-                    if hasattr(param_mode, 'value'):
-                        mode_value = param_mode.value
-                        if mode_value != 'd':
-                            mode_str = mode_value
-                    elif hasattr(param_mode, 'name'):
-                        mode_str = param_mode.name
-                    else:
-                        mode_str = str(param_mode)
-                
-                parameters.append(FunctionParameter(
-                    name=str(param_name),
-                    data_type=type_name,
-                    mode=mode_str,
-                    default_value=str(param_default) if param_default else None
-                ))
+def _parse_function_statement(node, query_text: str, query_hash: str, start: int, end: int) -> List[ASTObject]:
+    """Parse CREATE FUNCTION statements including PL/pgSQL functions."""
+    routine_fields = _parse_routine_common(node, query_text, query_hash, start, end)
+    if routine_fields is None:
+        return []
     
-    # Extract procedure options (language, volatility, etc.)
-    language = None
-    volatility = None
-    security = None
-    is_aggregate = False
-    is_window = False
-    is_leakproof = False
-    parallel = None
+    # Extract return type
+    return_type_node = getattr(node, "returnType", None)
+    if return_type_node:
+        routine_fields["return_type"] = _extract_full_type_name(return_type_node)
     
-    if hasattr(node, "options") and node.options:
-        for option in node.options:
-            if hasattr(option, "defname"):
-                option_name = option.defname
-                option_value = getattr(option, "arg", None)
-                
-                if option_name == "language":
-                    language = str(option_value.sval) if hasattr(option_value, "sval") else str(option_value)
-                elif option_name == "volatility":
-                    volatility = str(option_value.sval) if hasattr(option_value, "sval") else str(option_value)
-                elif option_name == "security":
-                    security = str(option_value.sval) if hasattr(option_value, "sval") else str(option_value)
-                elif option_name == "parallel":
-                    parallel = str(option_value.sval) if hasattr(option_value, "sval") else str(option_value)
-                elif option_name == "leakproof":
-                    is_leakproof = True
-                elif option_name == "aggregate":
-                    is_aggregate = True
-                elif option_name == "window":
-                    is_window = True
-    
-    # Extract dependencies from procedure body
-    dependencies = []
+    return [FunctionASTObject(**routine_fields)]
+
+def _parse_procedure_statement(node, query_text: str, query_hash: str, start: int, end: int) -> List[ASTObject]:
+    """Parse CREATE PROCEDURE statements."""
+    routine_fields = _parse_routine_common(node, query_text, query_hash, start, end)
+    if routine_fields is None:
+        return []
     
-    # Get procedure body
-    proc_body = None
-    if hasattr(node, "options") and node.options:
-        for option in node.options:
-            if hasattr(option, "defname") and option.defname == "as":
-                if hasattr(option, "arg") and option.arg:
-                    if hasattr(option.arg, "sval"):
-                        proc_body = option.arg.sval
-                    elif isinstance(option.arg, list):
-                        # Handle list of strings (multi-line procedure body)
-                        proc_body = " ".join(str(arg.sval) for arg in option.arg if hasattr(arg, "sval"))
-    
-    # Extract table dependencies from procedure body using proper SQL parsing
-    if proc_body:
-        dependencies = _extract_function_dependencies_with_parser(proc_body)
-    
-    return FunctionASTObject(
-        command=query_text,
-        object_name=proc_name,
-        dependencies=dependencies,
-        query_hash=query_hash,
-        query_start_pos=start,
-        query_end_pos=end,
-        schema=schema,
-        ast_node=node,
-        parameters=parameters,
-        return_type=None,  # Procedures don't have return types
-        language=language,
-        volatility=volatility,
-        security=security,
-        is_aggregate=is_aggregate,
-        is_window=is_window,
-        is_leakproof=is_leakproof,
-        parallel=parallel,
-        function_body=proc_body,
-        query_type=BuildStage.PROCEDURE  # Override the default FUNCTION type
-    )
+    # Procedures don't have return types; override the default FUNCTION type
+    return [FunctionASTObject(query_type=BuildStage.PROCEDURE, **routine_fields)]
+
+def _parse_routine_statement(node, query_text: str, query_hash: str, start: int, end: int) -> List[ASTObject]:
+    """Parse CREATE FUNCTION / CREATE PROCEDURE statements."""
+    if getattr(node, "is_procedure", False):
+        return _parse_procedure_statement(node, query_text, query_hash, start, end)
+    return _parse_function_statement(node, query_text, query_hash, start, end)
+
+# Statement handlers by pglast node class. Every handler takes
+# (node, query_text, query_hash, start, end) and returns a list of objects.
+_STMT_DISPATCH = {
+    CreateStmt: _parse_create_statement,
+    IndexStmt: _parse_index_statement,
+    AlterTableStmt: _parse_alter_table_statement,
+    CreatePolicyStmt: _parse_policy_statement,
+    GrantStmt: _parse_grant_statement,
+    ViewStmt: _parse_view_statement,
+    CreateFunctionStmt: _parse_routine_statement,
+}
+# Used when grants=False, so GRANT statements are skipped by the lookup itself
+_STMT_DISPATCH_NO_GRANTS = {cls: fn for cls, fn in _STMT_DISPATCH.items() if cls is not GrantStmt}
 
-def _extract_function_dependencies_with_parser(func_body: str) -> List[str]:
+def _extract_function_dependencies_with_parser(func_body: str, language: Optional[str] = None,
+                                                statement: Optional[str] = None) -> Tuple[str, ...]:
     """
     Extract table dependencies from PL/pgSQL function body using proper SQL parsing.
     Uses parse_sql with parse_plpgsql fallback to find table references.
+
+    Bodies declared as LANGUAGE plpgsql, or starting with BEGIN/DECLARE/<<label>>,
+    go straight to parse_plpgsql. That parser needs the full CREATE statement,
+    so pass it as statement when available.
+
+    Results are cached by body digest, since many functions share identical bodies.
     """
+    is_plpgsql = (language is not None and language.lower() == "plpgsql") or \
+        func_body.lstrip()[:16].upper().startswith(_PLPGSQL_PREFIXES)
+    key = (hashlib.blake2b(func_body.encode(), digest_size=16).digest(), is_plpgsql)
+    with _DEPS_CACHE_LOCK:
+        cached = _DEPS_CACHE.get(key)
+        if cached is not None:
+            _DEPS_CACHE.move_to_end(key)
+            return cached
+    
     dependencies = []
     
-    try:
+    stmts = None
+    if not is_plpgsql:
         # Try to parse the function body as SQL first
-        stmts = parse_sql(func_body)
+        try:
+            stmts = parse_sql(func_body)
+        except Exception:
+            pass
+    
+    if stmts is not None:
         for stmt in stmts:
             deps = _extract_dependencies_from_ast_node(stmt.stmt)
             dependencies.extend(deps)
-    except Exception:
-        # If parse_sql fails, try parse_plpgsql
+    else:
+        # PL/pgSQL body, or parse_sql failed: try parse_plpgsql
         try:
-            stmts = parse_plpgsql(func_body)
+            stmts = parse_plpgsql(statement or func_body)
             for stmt in stmts:
                 # parse_plpgsql returns dicts, not objects with .stmt
                 deps = _extract_dependencies_from_plpgsql_stmt(stmt)
@@ -745,98 +804,125 @@ def _extract_function_dependencies_with_parser(func_body: str) -> List[str]:
             seen.add(dep)
             unique_deps.append(dep)
     
-    return unique_deps
+    result = tuple(unique_deps)
+    with _DEPS_CACHE_LOCK:
+        _DEPS_CACHE[key] = result
+        if len(_DEPS_CACHE) > DEPS_CACHE_SIZE:
+            _DEPS_CACHE.popitem(last=False)
+    return result
 
 def _extract_dependencies_from_ast_node(node) -> List[str]:
     """Extract table dependencies from a pglast AST node."""
     dependencies = []
     
-    if not node:
-        return dependencies
-    
-    node_type = type(node).__name__
-    
-    if node_type == "SelectStmt":
-        # Handle SELECT statements
-        if hasattr(node, "fromClause") and node.fromClause:
-            for from_item in node.fromClause:
-                if hasattr(from_item, "relname"):
-                    table_name = from_item.relname.lower()
-                    schema = getattr(from_item, "schemaname", None)
-                    if schema:
-                        qualified_name = f"{schema.lower()}.{table_name}"
-                    else:
-                        qualified_name = table_name
-                    
-                    if qualified_name.lower() not in POSTGRES_BUILTINS:
-                        dependencies.append(qualified_name)
-    
-    elif node_type == "UpdateStmt":
-        # Handle UPDATE statements
-        if hasattr(node, "relation") and node.relation:
-            table_name = node.relation.relname.lower()
-            schema = getattr(node.relation, "schemaname", None)
-            if schema:
-                qualified_name = f"{schema.lower()}.{table_name}"
-            else:
-                qualified_name = table_name
-            
-            if qualified_name.lower() not in POSTGRES_BUILTINS:
-                dependencies.append(qualified_name)
-    
-    elif node_type == "DeleteStmt":
-        # Handle DELETE statements
-        if hasattr(node, "relation") and node.relation:
-            table_name = node.relation.relname.lower()
-            schema = getattr(node.relation, "schemaname", None)
-            if schema:
-                qualified_name = f"{schema.lower()}.{table_name}"
-            else:
-                qualified_name = table_name
-            
-            if qualified_name.lower() not in POSTGRES_BUILTINS:
-                dependencies.append(qualified_name)
-    
-    # Recursively check child nodes
-    for attr_name in dir(node):
-        if not attr_name.startswith('_'):
-            attr_value = getattr(node, attr_name)
-            if isinstance(attr_value, list):
-                for item in attr_value:
-                    if hasattr(item, '__class__'):
-                        deps = _extract_dependencies_from_ast_node(item)
-                        dependencies.extend(deps)
-            elif hasattr(attr_value, '__class__'):
-                deps = _extract_dependencies_from_ast_node(attr_value)
-                dependencies.extend(deps)
+    # Depth-first walk with an explicit stack; children are pushed in
+    # reverse so dependencies come out in source order
+    stack = [node] if node else []
+    while stack:
+        current = stack.pop()
+        node_cls = type(current)
+        
+        handler = _DEP_NODE_HANDLERS.get(node_cls)
+        if handler is not None:
+            handler(current, dependencies)
+        
+        # Queue child nodes, including those inside tuples
+        child_fields = _CHILD_FIELDS.get(node_cls)
+        if child_fields is None:
+            child_fields = _child_fields(node_cls)
+        children = []
+        for field_name in child_fields:
+            value = getattr(current, field_name)
+            if isinstance(value, Node):
+                children.append(value)
+            elif isinstance(value, tuple):
+                children.extend(item for item in value if isinstance(item, Node))
+        children.reverse()
+        stack.extend(children)
     
     return dependencies
 
+# Per-class names of the slots that can hold child nodes, filled on first use
+_CHILD_FIELDS: Dict[type, Tuple[str, ...]] = {}
+
+def _child_fields(node_cls: type) -> Tuple[str, ...]:
+    """Slots of a pglast node class that hold nodes or lists, skipping scalar and string fields."""
+    slots = node_cls.__slots__
+    if isinstance(slots, dict):
+        slot_names = tuple(
+            name for name, info in slots.items()
+            if _is_child_ctype(getattr(info, "c_type", None))
+        )
+    else:
+        # pglast versions without slot type information
+        slot_names = tuple(slots)
+    _CHILD_FIELDS[node_cls] = slot_names
+    return slot_names
+
+def _is_child_ctype(c_type: Optional[str]) -> bool:
+    """Pointer fields other than C strings can hold nodes; unknown types are kept."""
+    return c_type is None or (c_type.endswith("*") and c_type != "char*")
+
+def _deps_from_select(node: SelectStmt, dependencies: List[str]) -> None:
+    """Tables listed directly in a SELECT's FROM clause."""
+    for from_item in node.fromClause or ():
+        if type(from_item) is RangeVar:
+            _push_dep(dependencies, _relation_name(from_item))
+
+def _deps_from_join(node: JoinExpr, dependencies: List[str]) -> None:
+    """Tables joined in a FROM clause."""
+    for side in (node.larg, node.rarg):
+        if type(side) is RangeVar:
+            _push_dep(dependencies, _relation_name(side))
+
+def _deps_from_relation(node, dependencies: List[str]) -> None:
+    """Target table of an INSERT, UPDATE or DELETE."""
+    if node.relation:
+        _push_dep(dependencies, _relation_name(node.relation))
+
+# Dependency handlers by pglast node class, used by _extract_dependencies_from_ast_node
+_DEP_NODE_HANDLERS = {
+    SelectStmt: _deps_from_select,
+    JoinExpr: _deps_from_join,
+    InsertStmt: _deps_from_relation,
+    UpdateStmt: _deps_from_relation,
+    DeleteStmt: _deps_from_relation,
+}
+
+def _relation_name(rel: RangeVar) -> str:
+    """Lowercased, schema-qualified name of a relation."""
+    table_name = rel.relname.lower()
+    if rel.schemaname:
+        return f"{rel.schemaname.lower()}.{table_name}"
+    return table_name
+
 def _extract_full_type_name(type_node) -> str:
     """Extract full type name including precision, scale, and other modifiers."""
     if not type_node:
         return "unknown"
     
     # Get the base type name
-    if hasattr(type_node, "names") and type_node.names:
-        base_type = str(type_node.names[-1].sval)
+    names = getattr(type_node, "names", None)
+    if names:
+        base_type = names[-1].sval
     else:
         base_type = str(type_node)
     
     # Handle type modifiers (precision, scale, etc.)
     modifiers = []
     
-    if hasattr(type_node, "typmods") and type_node.typmods:
-        for typmod in type_node.typmods:
-            # typmod is A_Const with val containing Integer
-            if hasattr(typmod, "val") and hasattr(typmod.val, "ival"):
-                modifiers.append(str(typmod.val.ival))
-            elif hasattr(typmod, "ival"):
-                modifiers.append(str(typmod.ival))
-            elif hasattr(typmod, "sval"):
-                modifiers.append(str(typmod.sval))
-            else:
-                modifiers.append(str(typmod))
+    typmods = getattr(type_node, "typmods", None)
+    if typmods:
+        for typmod in typmods:
+            # typmod is usually A_Const with val containing Integer
+            ival = getattr(getattr(typmod, "val", None), "ival", None)
+            if ival is None:
+                ival = getattr(typmod, "ival", None)
+            if ival is not None:
+                modifiers.append(str(ival))
+                continue
+            sval = getattr(typmod, "sval", None)
+            modifiers.append(sval if sval is not None else str(typmod))
     
     # Build the full type name
     if modifiers:
@@ -845,44 +931,57 @@ def _extract_full_type_name(type_node) -> str:
         return base_type
 
 def _extract_dependencies_from_plpgsql_stmt(stmt_dict: dict) -> List[str]:
-    """Extract table dependencies from a parse_plpgsql statement dict."""
+    """
+    Extract table dependencies from a parse_plpgsql function dict.
+    Every embedded SQL expression is parsed and walked like a SQL function body.
+    """
     dependencies = []
     
-    # This is a simplified implementation for parse_plpgsql output
-    # The actual structure depends on what parse_plpgsql returns
-    # For now, we'll do a basic text search as fallback
-    import re
-    
-    stmt_text = str(stmt_dict)
+    # parse_plpgsql keeps embedded SQL as text in PLpgSQL_expr entries;
+    # walk the dicts and lists in source order to find them
+    stack = [stmt_dict]
+    while stack:
+        current = stack.pop()
+        if isinstance(current, dict):
+            expr = current.get("PLpgSQL_expr")
+            if expr is not None:
+                query = expr.get("query")
+                if query:
+                    dependencies.extend(_plpgsql_query_dependencies(query, expr.get("parseMode", 0)))
+            stack.extend(reversed(list(current.values())))
+        elif isinstance(current, list):
+            stack.extend(reversed(current))
     
-    # Look for table references in the statement
-    from_pattern = r'\bFROM\s+([a-zA-Z_][a-zA-Z0-9_]*\.?[a-zA-Z_][a-zA-Z0-9_]*)\b'
-    matches = re.findall(from_pattern, stmt_text, re.IGNORECASE)
+    return dependencies
+
+def _plpgsql_query_dependencies(query: str, parse_mode: int) -> List[str]:
+    """Table dependencies of one PL/pgSQL SQL expression."""
+    if parse_mode >= _PLPGSQL_MODE_ASSIGN:
+        # "target := expr": only the expression can reference tables
+        _, sep, value = query.partition(":=")
+        if not sep:
+            _, sep, value = query.partition("=")
+        query = value
+    if parse_mode != _PLPGSQL_MODE_DEFAULT:
+        # Bare expressions parse as the target list of a SELECT
+        query = "SELECT " + query
     
-    for match in matches:
-        table_name = match.strip()
-        if table_name and table_name.lower() not in POSTGRES_BUILTINS:
-            dependencies.append(table_name.lower())
+    dependencies = []
+    try:
+        stmts = parse_sql(query)
+    except Exception:
+        # Fall back to a text search for FROM references
+        for match in _FROM_RE.findall(query):
+            _push_dep(dependencies, match.lower())
+        return dependencies
     
+    for stmt in stmts:
+        dependencies.extend(_extract_dependencies_from_ast_node(stmt.stmt))
     return dependencies
 
 def _get_constraint_type(constraint) -> str:
     """Extract constraint type from constraint node."""
-    if hasattr(constraint, "contype"):
-        contype = constraint.contype
-        if contype == 1:
-            return "NOT NULL"
-        elif contype == 2:
-            return "FOREIGN KEY"
-        elif contype == 3:
-            return "PRIMARY KEY"
-        elif contype == 4:
-            return "UNIQUE"
-        elif contype == 5:
-            return "CHECK"
-        elif contype == 6:
-            return "EXCLUSION"
-    return "UNKNOWN"
+    return _CONSTRAINT_TYPE_NAMES.get(getattr(constraint, "contype", None), "UNKNOWN")
 
 def _extract_constraint_columns(constraint) -> List[str]:
     """Extract column names from constraint node."""
@@ -899,24 +998,31 @@ def _extract_constraint_columns(constraint) -> List[str]:
                 columns.append(str(exclusion.name))
     return columns
 
+def iter_build_queries(sql: str, grants: bool = True) -> Iterator[ASTObject]:
+    """Stream ASTObjects from SQL without materializing the full list."""
+    return _iter_sql_objects(sql, grants)
+
 # Legacy compatibility functions
-def extract_build_queries(sql: str, use_ast_objects: bool = True, grants: bool = True) -> Union[ASTList, List[dict]]:
+def extract_build_queries(sql: str, use_ast_objects: bool = True, grants: bool = True, workers: int = 1) -> Union[ASTList, List[dict]]:
     """Legacy function for backward compatibility."""
     if use_ast_objects:
-        return parse_sql_to_ast_objects(sql, grants=grants)
+        return parse_sql_to_ast_objects(sql, grants=grants, workers=workers)
     else:
         # Convert ASTObjects to dict format for legacy compatibility
-        ast_objects = parse_sql_to_ast_objects(sql, grants=grants)
-        return [obj.__dict__ for obj in ast_objects]
+        ast_objects = parse_sql_to_ast_objects(sql, grants=grants, workers=workers)
+        return [_to_legacy_dict(obj) for obj in ast_objects]
+
+def _to_legacy_dict(ast_obj: ASTObject) -> dict:
+    """Map each dataclass field to its value, the dict shape extract_build_queries has always returned."""
+    legacy = {f.name: getattr(ast_obj, f.name) for f in fields(ast_obj)}
+    legacy["dependencies"] = list(ast_obj.dependencies)
+    return legacy
 
 def load_source(source: str, schemas: Optional[List[str]] = None, grants: bool = True) -> ASTList:
     """Load schema objects from a source (file, directory, or connection string)."""
-    import os
     
     # Handle git repositories first (before .sql files to avoid conflicts)
     if source.startswith(('git@', 'https://')) and ('.git' in source):
-        from pg_compose_core.lib.git import extract_from_git_repo
-        
         # Parse the source to separate repo URL from target path
         # The GitRepoContext handles #branch parsing internally
         repo_url = source
@@ -930,41 +1036,30 @@ def load_source(source: str, schemas: Optional[List[str]] = None, grants: bool =
             repo_url = parts[0] + '.git'
             target_path = parts[1]
         
+        # If target_path points to a specific .sql file, read just that blob from a bare clone
+        if target_path and target_path.endswith('.sql'):
+            repo = extract_from_git_repo(repo_url, target_path, bare=True)
+            with repo:
+                sql = repo.read_blob(target_path)
+            if sql is None:
+                raise ValueError(f"File '{target_path}' not found in git repository: {source}")
+            return parse_sql_to_ast_objects(sql, grants=grants)
+        
         with extract_from_git_repo(repo_url, target_path) as working_dir:
-            # If target_path points to a specific .sql file, load just that file
-            if target_path and target_path.endswith('.sql'):
-                # For files, the working_dir is the repository root, so we need to join with target_path
-                file_path = os.path.join(working_dir, target_path)
-                if not os.path.exists(file_path):
-                    raise ValueError(f"File '{target_path}' not found in git repository: {source}")
-                with open(file_path, 'r') as f:
-                    sql = f.read()
-                return parse_sql_to_ast_objects(sql, grants=grants)
-            else:
-                # Load all .sql files in the directory
-                all_sql = []
-                search_dir = working_dir
-                if target_path:
-                    search_dir = os.path.join(working_dir, target_path)
-                
-                for root, dirs, files in os.walk(search_dir):
-                    for file in files:
-                        if file.endswith('.sql'):
-                            file_path = os.path.join(root, file)
-                            with open(file_path, 'r') as f:
-                                all_sql.append(f.read())
-                
-                if not all_sql:
-                    raise ValueError(f"No .sql files found in git repository: {source}")
-                
-                # Parse all SQL files
-                combined_sql = '\n\n'.join(all_sql)
-                return parse_sql_to_ast_objects(combined_sql, grants=grants)
+            # Load all .sql files in the directory
+            search_dir = working_dir
+            if target_path:
+                search_dir = os.path.join(working_dir, target_path)
+            
+            all_sql = _read_sql_files(search_dir)
+            if not all_sql:
+                raise ValueError(f"No .sql files found in git repository: {source}")
+            
+            return _parse_sql_files(all_sql, grants)
     
     # Handle .sql files
     elif source.endswith('.sql'):
-        with open(source, 'r') as f:
-            sql = f.read()
+        sql = _read_sql_file(source)
         return parse_sql_to_ast_objects(sql, grants=grants)
     
     # Handle postgres:// URIs
@@ -973,29 +1068,74 @@ def load_source(source: str, schemas: Optional[List[str]] = None, grants: bool =
         raise NotImplementedError("Database connections not yet implemented")
     
     # Handle raw SQL strings (if it contains SQL keywords, assume it's raw SQL)
-    elif any(keyword in source.upper() for keyword in ['CREATE', 'DROP', 'ALTER', 'GRANT', 'REVOKE', 'SELECT', 'INSERT', 'UPDATE', 'DELETE']):
+    elif _SQL_KW_RE.search(source):
         return parse_sql_to_ast_objects(source, grants=grants)
     
     # Handle directories (look for .sql files)
     elif os.path.isdir(source):
-        all_sql = []
-        for root, dirs, files in os.walk(source):
-            for file in files:
-                if file.endswith('.sql'):
-                    file_path = os.path.join(root, file)
-                    with open(file_path, 'r') as f:
-                        all_sql.append(f.read())
-        
+        all_sql = _read_sql_files(source)
         if not all_sql:
             raise ValueError(f"No .sql files found in directory: {source}")
         
-        # Parse all SQL files
-        combined_sql = '\n\n'.join(all_sql)
-        return parse_sql_to_ast_objects(combined_sql, grants=grants)
+        return _parse_sql_files(all_sql, grants)
     
     else:
         raise NotImplementedError(f"Source type not supported: {source}")
 
+# Directories with fewer .sql files than this are read in-process
+PARALLEL_FILES_THRESHOLD = 4
+
+def _iter_sql_files(directory: str) -> Iterator[str]:
+    """Yield the path of every .sql file under directory, without following symlinked directories."""
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                yield from _iter_sql_files(entry.path)
+            elif entry.name.endswith('.sql'):
+                yield entry.path
+
+def _read_sql_file(file_path: str) -> str:
+    """Read a .sql file as UTF-8."""
+    with open(file_path, 'rb') as f:
+        return f.read().decode('utf-8')
+
+def _read_sql_files(directory: str) -> List[str]:
+    """
+    Read the contents of every .sql file under directory, overlapping reads in a thread pool.
+    Files are returned in sorted path order so results do not depend on directory listing order.
+    """
+    paths = sorted(_iter_sql_files(directory))
+    if len(paths) < PARALLEL_FILES_THRESHOLD:
+        return [_read_sql_file(path) for path in paths]
+    
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        return list(executor.map(_read_sql_file, paths))
+
+def _parse_sql_files(all_sql: List[str], grants: bool) -> ASTList:
+    """
+    Parse each file's SQL separately, fanning out to a process pool when the
+    files that need parsing add up to more than PARALLEL_PARSE_THRESHOLD.
+    Object positions are relative to the file they came from.
+    Files already in the parse cache are not parsed again.
+    """
+    keys = [_parse_cache_key(sql, grants) for sql in all_sql]
+    results = [_parse_cache_get(key) for key in keys]
+    misses = [i for i, cached in enumerate(results) if cached is None]
+    
+    workers = min(os.cpu_count() or 1, len(misses))
+    if workers < 2 or sum(len(all_sql[i]) for i in misses) <= PARALLEL_PARSE_THRESHOLD:
+        for i in misses:
+            results[i] = _parse_sql_batch(all_sql[i], grants)
+            _parse_cache_put(keys[i], results[i])
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            batches = executor.map(_parse_sql_batch, [all_sql[i] for i in misses], [grants] * len(misses))
+            for i, batch in zip(misses, batches):
+                results[i] = batch
+                _parse_cache_put(keys[i], batch)
+    
+    return ASTList([_copy_cached(obj) for obj in chain.from_iterable(results)])
+
 def _extract_default_value(expr) -> str:
     """Extract default value from an AST expression."""
     if hasattr(expr, "val"):
@@ -1014,30 +1154,14 @@ def _extract_default_value(expr) -> str:
             return str(val.boolval).lower()
     elif hasattr(expr, "funcname"):
         # Function call (e.g., NOW(), CURRENT_TIMESTAMP)
-        func_name = ".".join(str(name.sval) for name in expr.funcname)
+        func_name = ".".join(name.sval for name in expr.funcname)
         return func_name + "()"
     elif hasattr(expr, "op"):
         # SQLValueFunction (e.g., CURRENT_TIMESTAMP, CURRENT_DATE, etc.)
-        from pglast.enums import SQLValueFunctionOp
         op = expr.op
         
-        # Map SQLValueFunctionOp to SQL function names
-        op_mapping = {
-            SQLValueFunctionOp.SVFOP_CURRENT_TIMESTAMP: "CURRENT_TIMESTAMP",
-            SQLValueFunctionOp.SVFOP_CURRENT_DATE: "CURRENT_DATE",
-            SQLValueFunctionOp.SVFOP_CURRENT_TIME: "CURRENT_TIME",
-            SQLValueFunctionOp.SVFOP_LOCALTIME: "LOCALTIME",
-            SQLValueFunctionOp.SVFOP_LOCALTIMESTAMP: "LOCALTIMESTAMP",
-            SQLValueFunctionOp.SVFOP_CURRENT_ROLE: "CURRENT_ROLE",
-            SQLValueFunctionOp.SVFOP_CURRENT_USER: "CURRENT_USER",
-            SQLValueFunctionOp.SVFOP_USER: "USER",
-            SQLValueFunctionOp.SVFOP_SESSION_USER: "SESSION_USER",
-            SQLValueFunctionOp.SVFOP_CURRENT_CATALOG: "CURRENT_CATALOG",
-            SQLValueFunctionOp.SVFOP_CURRENT_SCHEMA: "CURRENT_SCHEMA",
-        }
-        
-        if op in op_mapping:
-            return op_mapping[op]
+        if op in _SQL_VALUE_FUNCTIONS:
+            return _SQL_VALUE_FUNCTIONS[op]
         else:
             # Fallback for unknown SQLValueFunctionOp
             return f"SQLValueFunction({op.name})"
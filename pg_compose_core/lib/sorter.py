@@ -1,7 +1,10 @@
-from typing import List, Dict, Optional, Union
-from collections import defaultdict, deque
+import logging
+from typing import Dict, Iterable, List, Optional, Union
+from collections import defaultdict
 from pg_compose_core.lib.ast.objects import ASTObject
 
+_LOG = logging.getLogger(__name__)
+
 def sort_queries(objects: List[ASTObject], use_object_names: bool = True, grant_handling: bool = True) -> List[ASTObject]:
     """
     Sort queries by dependencies using topological sort.
@@ -25,9 +28,12 @@ def sort_alter_commands(command_objects: List[Union[Dict, ASTObject]]) -> List[U
 
 def _get_object_name(obj: Union[dict, ASTObject]) -> Optional[str]:
     """Extract qualified_name from various object types."""
-    if isinstance(obj, ASTObject):
+    # ASTObjects are the common case, so try the attribute before type checks
+    try:
         return obj.qualified_name
-    elif isinstance(obj, dict):
+    except AttributeError:
+        pass
+    if isinstance(obj, dict):
         # For dict objects, construct qualified name if schema is present
         object_name = obj.get("object_name")
         schema = obj.get("schema")
@@ -38,99 +44,111 @@ def _get_object_name(obj: Union[dict, ASTObject]) -> Optional[str]:
 
 def _get_dependencies(obj: Union[dict, ASTObject]) -> List[str]:
     """Extract dependencies from various object types."""
-    if isinstance(obj, ASTObject):
+    try:
         return obj.dependencies
-    elif isinstance(obj, dict):
+    except AttributeError:
+        pass
+    if isinstance(obj, dict):
         return obj.get("dependencies", [])
     return []
 
 def _get_query_hash(obj: Union[dict, ASTObject]) -> Optional[str]:
     """Extract query_hash from various object types."""
-    if isinstance(obj, ASTObject):
+    try:
         return obj.query_hash
-    elif isinstance(obj, dict):
+    except AttributeError:
+        pass
+    if isinstance(obj, dict):
         return obj.get("query_hash")
     return None
 
+# Node states for _topological_order
+_UNVISITED, _IN_PROGRESS, _DONE = 0, 1, 2
+
+def _topological_order(nodes: Iterable[str], depends_on: Dict[str, List[str]]) -> List[str]:
+    """
+    Order nodes so every node comes after the nodes it depends on.
+
+    Iterative depth-first search that emits a node once all of its dependencies
+    have been emitted, so nodes keep their input order unless a dependency has
+    to move ahead. Reaching a node that is still in progress means a cycle.
+    """
+    state = dict.fromkeys(nodes, _UNVISITED)
+    no_deps = ()
+    order = []
+    for root in state:
+        if state[root] != _UNVISITED:
+            continue
+        state[root] = _IN_PROGRESS
+        stack = [(root, iter(depends_on.get(root, no_deps)))]
+        while stack:
+            node, deps = stack[-1]
+            for dep in deps:
+                dep_state = state[dep]
+                if dep_state == _UNVISITED:
+                    state[dep] = _IN_PROGRESS
+                    stack.append((dep, iter(depends_on.get(dep, no_deps))))
+                    break
+                if dep_state == _IN_PROGRESS:
+                    raise ValueError("Cyclic dependency detected")
+            else:
+                stack.pop()
+                state[node] = _DONE
+                order.append(node)
+    return order
+
 def _sort_by_query_hash(queries: List[ASTObject]) -> List[ASTObject]:
     """Original sorting logic using query_hash as primary key."""
-    import logging
-    
-    # Separate objects by type
+    # Separate objects by type, and index the ones that take part in the sort
     grant_index_objects = []
-    other_objects = []
     objects_without_hash = []
+    name_to_hash = {}
+    hash_to_query = {}
+    pending = []
 
     for q in queries:
-        object_name = _get_object_name(q)
-        query_hash = _get_query_hash(q)
         query_type = getattr(q, 'query_type', None)
         
-        logging.debug(f"DEBUG _sort_by_query_hash: object={object_name}, hash={query_hash}, type={query_type}")
-        
         # Check if this is a GRANT or INDEX object
         if query_type and hasattr(query_type, 'value'):
             if query_type.value in ['grant', 'index']:
                 grant_index_objects.append(q)
                 continue
         
-        if query_hash:
-            other_objects.append(q)
-        else:
-            objects_without_hash.append(q)
-
-    # Build object_name -> query_hash map for non-grant/index objects
-    name_to_hash = {}
-    hash_to_query = {}
-
-    for q in other_objects:
-        object_name = _get_object_name(q)
         query_hash = _get_query_hash(q)
+        if not query_hash:
+            objects_without_hash.append(q)
+            continue
         
-        if object_name and query_hash:
+        # Build object_name -> query_hash map for non-grant/index objects
+        object_name = _get_object_name(q)
+        if object_name:
             name_to_hash[object_name] = query_hash
-        if query_hash:
-            hash_to_query[query_hash] = q
+        hash_to_query[query_hash] = q
+        pending.append((query_hash, _get_dependencies(q)))
 
-    logging.debug(f"DEBUG name_to_hash: {name_to_hash}")
-    logging.debug(f"DEBUG hash_to_query keys: {list(hash_to_query.keys())}")
+    if _LOG.isEnabledFor(logging.DEBUG):
+        _LOG.debug("DEBUG name_to_hash: %s", name_to_hash)
+        _LOG.debug("DEBUG hash_to_query keys: %s", list(hash_to_query))
 
-    # Build graph for non-grant/index objects
-    graph = defaultdict(set)
-    in_degree = defaultdict(int)
+    # Build graph for non-grant/index objects once every name is known:
+    # query_hash -> hashes it depends on
+    depends_on = defaultdict(list)
 
-    for q in other_objects:
-        query_hash = _get_query_hash(q)
-        if not query_hash:
-            continue
-            
-        for dep in _get_dependencies(q):
+    for query_hash, deps in pending:
+        for dep in deps:
             dep_hash = name_to_hash.get(dep)
-            logging.debug(f"DEBUG dependency: {dep} -> hash {dep_hash}")
-            if dep_hash:
-                graph[dep_hash].add(query_hash)
-                in_degree[query_hash] += 1
+            # Self-references don't order anything
+            if dep_hash and dep_hash != query_hash:
+                depends_on[query_hash].append(dep_hash)
 
-    logging.debug(f"DEBUG graph: {dict(graph)}")
-    logging.debug(f"DEBUG in_degree: {dict(in_degree)}")
+    if _LOG.isEnabledFor(logging.DEBUG):
+        _LOG.debug("DEBUG depends_on: %s", dict(depends_on))
 
     # Topological sort for non-grant/index objects
-    queue = deque([h for h in hash_to_query if in_degree[h] == 0])
-    sorted_hashes = []
-
-    while queue:
-        current = queue.popleft()
-        sorted_hashes.append(current)
-        for neighbor in graph[current]:
-            in_degree[neighbor] -= 1
-            if in_degree[neighbor] == 0:
-                queue.append(neighbor)
+    sorted_hashes = _topological_order(hash_to_query, depends_on)
 
-    logging.debug(f"DEBUG sorted_hashes: {sorted_hashes}")
-    logging.debug(f"DEBUG len(sorted_hashes): {len(sorted_hashes)}, len(hash_to_query): {len(hash_to_query)}")
-
-    if len(sorted_hashes) != len(hash_to_query):
-        raise ValueError("Cyclic dependency detected")
+    _LOG.debug("DEBUG sorted_hashes: %s", sorted_hashes)
 
     # Return: sorted non-grant/index objects first, then grant/index objects, then objects without hash
     result = [hash_to_query[h] for h in sorted_hashes]
@@ -140,25 +158,34 @@ def _sort_by_query_hash(queries: List[ASTObject]) -> List[ASTObject]:
 
 def _sort_by_object_names(queries: List[ASTObject], grant_handling: bool = False) -> List[ASTObject]:
     """Sorting logic using object_name as primary key with optional GRANT handling."""
-    import logging
-    logging.debug(f"DEBUG _sort_by_object_names input: {len(queries)} queries")
+    debug = _LOG.isEnabledFor(logging.DEBUG)
+    if debug:
+        _LOG.debug("DEBUG _sort_by_object_names input: %d queries", len(queries))
     
-    # Build object_name -> query map
+    # Resolve each object's name and dependencies once, splitting named from
+    # unnamed objects, and build the object_name -> query map
+    named = []
+    unnamed = []
     name_to_query = {}
     for q in queries:
         object_name = _get_object_name(q)
         if object_name:
+            named.append((q, object_name, _get_dependencies(q)))
             name_to_query[object_name] = q
-            logging.debug(f"DEBUG added to name_to_query: {object_name} -> {q}")
+            if debug:
+                _LOG.debug("DEBUG added to name_to_query: %s -> %r", object_name, q)
         else:
-            logging.debug(f"DEBUG skipped object without name: {q}")
+            unnamed.append(q)
+            if debug:
+                _LOG.debug("DEBUG skipped object without name: %r", q)
     
-    logging.debug(f"DEBUG name_to_query has {len(name_to_query)} entries")
+    if debug:
+        _LOG.debug("DEBUG name_to_query has %d entries", len(name_to_query))
     
     # Build dependency -> object_name mapping for GRANTs (if enabled)
     dep_to_object = {}
     if grant_handling:
-        for q in queries:
+        for q, object_name, deps in named:
             # Check if this is a GRANT object by checking query_type
             if isinstance(q, dict):
                 query_type = q.get("query_type", "")
@@ -171,62 +198,32 @@ def _sort_by_object_names(queries: List[ASTObject], grant_handling: bool = False
             
             if query_type == "grant":
                 # For GRANTs, map the dependency to the object name
-                for dep in _get_dependencies(q):
-                    dep_to_object[dep] = _get_object_name(q)
-
-    # Build graph using object names
-    graph = defaultdict(set)
-    in_degree = defaultdict(int)
-
-    for q in queries:
-        object_name = _get_object_name(q)
-        if object_name:
-            for dep in _get_dependencies(q):
-                # Check if dependency exists as an object name
-                if dep in name_to_query:
-                    graph[dep].add(object_name)
-                    in_degree[object_name] += 1
-                # Check if dependency maps to a GRANT object name (if grant handling enabled)
-                elif grant_handling and dep in dep_to_object:
-                    grant_obj_name = dep_to_object[dep]
-                    if grant_obj_name in name_to_query and grant_obj_name != object_name:
-                        graph[grant_obj_name].add(object_name)
-                        in_degree[object_name] += 1
-                # If dependency doesn't exist in query objects, ignore it
-                # (it means the object is already created or doesn't need to be created)
+                for dep in deps:
+                    dep_to_object[dep] = object_name
+
+    # Build graph using object names. A dependency resolves to the object of that
+    # name or, with grant handling, to the GRANT object covering it. Dependencies
+    # that resolve to nothing are ignored (already created or not ours to create).
+    depends_on = defaultdict(list)
+    grant_target = dep_to_object.get
+
+    for q, object_name, deps in named:
+        for dep in deps:
+            target = dep if dep in name_to_query else grant_target(dep)
+            if target is None or target == object_name or target not in name_to_query:
+                continue
+            depends_on[object_name].append(target)
 
     # Topological sort
-    queue = deque([name for name in name_to_query if in_degree[name] == 0])
-    sorted_names = []
-
-    while queue:
-        current = queue.popleft()
-        sorted_names.append(current)
-        for neighbor in graph[current]:
-            in_degree[neighbor] -= 1
-            if in_degree[neighbor] == 0:
-                queue.append(neighbor)
-
-    if len(sorted_names) != len(name_to_query):
-        raise ValueError("Cyclic dependency detected")
-
-    # Return queries in sorted order
-    sorted_queries = []
-    
-    # First, add queries that have object names and dependencies (in sorted order)
-    for name in sorted_names:
-        sorted_queries.append(name_to_query[name])
-    
-    # Then, add queries that have object names but no dependencies (not in sorted_names)
-    for q in queries:
-        object_name = _get_object_name(q)
-        if object_name and object_name not in sorted_names:
-            sorted_queries.append(q)
-    
-    # Finally, add any queries without object names at the end
-    for q in queries:
-        if not _get_object_name(q):
-            sorted_queries.append(q)
+    sorted_names = _topological_order(name_to_query, depends_on)
+
+    # Return queries in sorted order: named objects in dependency order, then
+    # named objects left out of the sort, then objects without names
+    sorted_queries = [name_to_query[name] for name in sorted_names]
+    sorted_set = set(sorted_names)
+    sorted_queries.extend(q for q, object_name, _ in named if object_name not in sorted_set)
+    sorted_queries.extend(unnamed)
     
-    logging.debug(f"DEBUG _sort_by_object_names output: {len(sorted_queries)} queries")
+    if debug:
+        _LOG.debug("DEBUG _sort_by_object_names output: %d queries", len(sorted_queries))
     return sorted_queries
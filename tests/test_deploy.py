@@ -1,14 +1,12 @@
 import pytest
-import tempfile
-import os
 from pg_compose_core.lib.deploy import diff_sort, deploy
-from pg_compose_core.lib.ast import ASTList
+from pg_compose_core.lib.ast import ASTList, ASTObject, BuildStage, ResourceType
 
 
 class TestDeploy:
     """Test deployment functionality independent of CLI."""
     
-    def test_diff_sort_new_table(self):
+    def test_diff_sort_new_table(self, tmp_path):
         """Test diff_sort with a new table."""
         source_a = """
         CREATE TABLE users (
@@ -29,28 +27,19 @@ class TestDeploy:
         );
         """
         
-        # Write sources to temporary files
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.sql', delete=False) as f1:
-            f1.write(source_a)
-            file_a = f1.name
-        
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.sql', delete=False) as f2:
-            f2.write(source_b)
-            file_b = f2.name
-        
-        try:
-            result = diff_sort(file_a, file_b)
-            
-            # Should have one alter command for the new table
-            assert len(result) == 1
-            assert result[0].query_type.value == "base_table"
-            assert result[0].object_name == "orders"
-            
-        finally:
-            os.unlink(file_a)
-            os.unlink(file_b)
+        file_a = tmp_path / "a.sql"
+        file_a.write_text(source_a)
+        file_b = tmp_path / "b.sql"
+        file_b.write_text(source_b)
+        
+        result = diff_sort(str(file_a), str(file_b))
+        
+        # Should have one alter command for the new table
+        assert len(result) == 1
+        assert result[0].query_type == BuildStage.BASE_TABLE
+        assert result[0].object_name == "orders"
     
-    def test_diff_sort_qualified_names(self):
+    def test_diff_sort_qualified_names(self, tmp_path):
         """Test diff_sort with schema-qualified names."""
         source_a = """
         CREATE TABLE public.users (
@@ -71,28 +60,19 @@ class TestDeploy:
         );
         """
         
-        # Write sources to temporary files
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.sql', delete=False) as f1:
-            f1.write(source_a)
-            file_a = f1.name
-        
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.sql', delete=False) as f2:
-            f2.write(source_b)
-            file_b = f2.name
-        
-        try:
-            result = diff_sort(file_a, file_b)
-            
-            # Should have one alter command for the new table
-            assert len(result) == 1
-            assert result[0].query_type.value == "base_table"
-            assert result[0].qualified_name == "public.orders"
-            
-        finally:
-            os.unlink(file_a)
-            os.unlink(file_b)
+        file_a = tmp_path / "a.sql"
+        file_a.write_text(source_a)
+        file_b = tmp_path / "b.sql"
+        file_b.write_text(source_b)
+        
+        result = diff_sort(str(file_a), str(file_b))
+        
+        # Should have one alter command for the new table
+        assert len(result) == 1
+        assert result[0].query_type == BuildStage.BASE_TABLE
+        assert result[0].qualified_name == "public.orders"
     
-    def test_diff_sort_new_column(self):
+    def test_diff_sort_new_column(self, tmp_path):
         """Test diff_sort with a new column."""
         source_a = """
         CREATE TABLE users (
@@ -109,27 +89,18 @@ class TestDeploy:
         );
         """
         
-        # Write sources to temporary files
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.sql', delete=False) as f1:
-            f1.write(source_a)
-            file_a = f1.name
-        
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.sql', delete=False) as f2:
-            f2.write(source_b)
-            file_b = f2.name
-        
-        try:
-            result = diff_sort(file_a, file_b)
-            
-            # Should have one alter command for the new column
-            assert len(result) == 1
-            assert result[0].query_type.value == "unknown"
-            
-        finally:
-            os.unlink(file_a)
-            os.unlink(file_b)
+        file_a = tmp_path / "a.sql"
+        file_a.write_text(source_a)
+        file_b = tmp_path / "b.sql"
+        file_b.write_text(source_b)
+        
+        result = diff_sort(str(file_a), str(file_b))
+        
+        # Should have one alter command for the new column
+        assert len(result) == 1
+        assert result[0].query_type == BuildStage.UNKNOWN
     
-    def test_diff_sort_new_index(self):
+    def test_diff_sort_new_index(self, tmp_path):
         """Test diff_sort with a new index."""
         source_a = """
         CREATE TABLE users (
@@ -146,28 +117,19 @@ class TestDeploy:
         CREATE INDEX idx_users_name ON users(name);
         """
         
-        # Write sources to temporary files
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.sql', delete=False) as f1:
-            f1.write(source_a)
-            file_a = f1.name
-        
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.sql', delete=False) as f2:
-            f2.write(source_b)
-            file_b = f2.name
-        
-        try:
-            result = diff_sort(file_a, file_b)
-            
-            # Should have one alter command for the new index
-            assert len(result) == 1
-            assert result[0].query_type.value == "index"
-            assert result[0].object_name == "idx_users_name"
-            
-        finally:
-            os.unlink(file_a)
-            os.unlink(file_b)
+        file_a = tmp_path / "a.sql"
+        file_a.write_text(source_a)
+        file_b = tmp_path / "b.sql"
+        file_b.write_text(source_b)
+        
+        result = diff_sort(str(file_a), str(file_b))
+        
+        # Should have one alter command for the new index
+        assert len(result) == 1
+        assert result[0].query_type == BuildStage.INDEX
+        assert result[0].object_name == "idx_users_name"
     
-    def test_diff_sort_no_changes(self):
+    def test_diff_sort_no_changes(self, tmp_path):
         """Test diff_sort with no changes."""
         source = """
         CREATE TABLE users (
@@ -176,25 +138,17 @@ class TestDeploy:
         );
         """
         
-        # Write source to temporary file
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.sql', delete=False) as f:
-            f.write(source)
-            file_path = f.name
-        
-        try:
-            result = diff_sort(file_path, file_path)
-            
-            # Should have no changes
-            assert len(result) == 0
-            
-        finally:
-            os.unlink(file_path)
+        file_path = tmp_path / "schema.sql"
+        file_path.write_text(source)
+        
+        result = diff_sort(str(file_path), str(file_path))
+        
+        # Should have no changes
+        assert len(result) == 0
     
     def test_deploy_dry_run(self):
         """Test deploy function in dry-run mode."""
         # Create a simple ASTList for testing
-        from pg_compose_core.lib.ast_objects import ASTObject, BuildStage
-        
         test_objects = [
             ASTObject(
                 command="CREATE TABLE test (id SERIAL PRIMARY KEY)",
@@ -228,7 +182,7 @@ class TestDeploy:
         assert result["changes_count"] == 1
         assert sql in result["sql"]
     
-    def test_diff_sort_with_grants(self):
+    def test_diff_sort_with_grants(self, tmp_path):
         """Test diff_sort with grant statements."""
         source_a = """
         CREATE TABLE users (
@@ -245,29 +199,20 @@ class TestDeploy:
         GRANT SELECT, INSERT ON users TO app_user;
         """
         
-        # Write sources to temporary files
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.sql', delete=False) as f1:
-            f1.write(source_a)
-            file_a = f1.name
-        
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.sql', delete=False) as f2:
-            f2.write(source_b)
-            file_b = f2.name
-        
-        try:
-            result = diff_sort(file_a, file_b, grants=True)
-            
-            # Should have one grant command
-            assert len(result) == 1
-            assert result[0].query_type.value == "grant"
-            assert result[0].object_name == "users"
-            assert result[0].resource_type.value == "table"
-            
-        finally:
-            os.unlink(file_a)
-            os.unlink(file_b)
+        file_a = tmp_path / "a.sql"
+        file_a.write_text(source_a)
+        file_b = tmp_path / "b.sql"
+        file_b.write_text(source_b)
+        
+        result = diff_sort(str(file_a), str(file_b), grants=True)
+        
+        # Should have one grant command
+        assert len(result) == 1
+        assert result[0].query_type == BuildStage.GRANT
+        assert result[0].object_name == "users"
+        assert result[0].resource_type == ResourceType.TABLE
     
-    def test_diff_sort_without_grants(self):
+    def test_diff_sort_without_grants(self, tmp_path):
         """Test diff_sort without grant statements."""
         source_a = """
         CREATE TABLE users (
@@ -284,21 +229,12 @@ class TestDeploy:
         GRANT SELECT, INSERT ON users TO app_user;
         """
         
-        # Write sources to temporary files
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.sql', delete=False) as f1:
-            f1.write(source_a)
-            file_a = f1.name
-        
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.sql', delete=False) as f2:
-            f2.write(source_b)
-            file_b = f2.name
-        
-        try:
-            result = diff_sort(file_a, file_b, grants=False)
-            
-            # Should have no changes since grants are excluded
-            assert len(result) == 0
-            
-        finally:
-            os.unlink(file_a)
-            os.unlink(file_b) 
\ No newline at end of file
+        file_a = tmp_path / "a.sql"
+        file_a.write_text(source_a)
+        file_b = tmp_path / "b.sql"
+        file_b.write_text(source_b)
+        
+        result = diff_sort(str(file_a), str(file_b), grants=False)
+        
+        # Should have no changes since grants are excluded
+        assert len(result) == 0
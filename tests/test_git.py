@@ -1,10 +1,13 @@
 import pytest
 import os
+import subprocess
+import pg_compose_core.lib.git as git_module
 from pg_compose_core.lib.git import extract_from_git_repo
 from pg_compose_core.lib.parser import load_source
 from pg_compose_core.lib.ast import ASTList
 
 
+@pytest.mark.network
 def test_git_repo_clone():
     """Test that we can clone a git repository and access files."""
     
@@ -27,6 +30,7 @@ def test_git_repo_clone():
         pytest.skip(f"Git clone failed: {e}")
 
 
+@pytest.mark.network
 def test_git_repo_parse_sql():
     """Test that we can clone a git repository and parse SQL files."""
     
@@ -45,6 +49,7 @@ def test_git_repo_parse_sql():
         pytest.skip(f"Git SQL parsing failed: {e}")
 
 
+@pytest.mark.network
 def test_git_repo_specific_file():
     """Test accessing a specific SQL file from a git repository."""
     
@@ -62,4 +67,170 @@ def test_git_repo_specific_file():
             assert len(result) > 0, "Should parse the specific SQL file"
             
     except Exception as e:
-        pytest.skip(f"Git file access failed: {e}") 
\ No newline at end of file
+        pytest.skip(f"Git file access failed: {e}")
+
+
+def _git(cwd, *args) -> str:
+    result = subprocess.run(["git", "-c", "user.name=t", "-c", "user.email=t@t", *args],
+                            cwd=cwd, check=True, capture_output=True, text=True)
+    return result.stdout.strip()
+
+
+class OriginRepo:
+    """A local repository on branch main that tests clone from over file://."""
+    
+    def __init__(self, path):
+        self.path = path
+        self.url = f"file://{path}"
+        path.mkdir()
+        _git(path, "init", "-q", "-b", "main")
+    
+    def commit(self, files: dict) -> str:
+        """Write files (relative path -> text), commit them and return the commit hash."""
+        for name, text in files.items():
+            file_path = self.path / name
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+            file_path.write_text(text)
+        _git(self.path, "add", ".")
+        _git(self.path, "commit", "-q", "-m", "update")
+        return _git(self.path, "rev-parse", "HEAD")
+
+
+@pytest.fixture
+def origin_repo(tmp_path):
+    return OriginRepo(tmp_path / "origin")
+
+
+@pytest.fixture
+def git_cache(tmp_path, monkeypatch):
+    cache = tmp_path / "cache"
+    monkeypatch.setattr(git_module, "GIT_CACHE_DIR", str(cache))
+    return cache
+
+
+def test_git_repo_cache_reused(origin_repo, git_cache):
+    """Test that a checkout of an unchanged branch reuses the cached clone, and a moved one replaces it."""
+    origin_repo.commit({"schema.sql": "CREATE TABLE users (id integer);\n"})
+    url = f"{origin_repo.url}#main"
+    
+    with extract_from_git_repo(url) as first:
+        assert os.path.isfile(os.path.join(first, "schema.sql"))
+    with extract_from_git_repo(url) as again:
+        assert again == first
+    
+    origin_repo.commit({"schema.sql": "CREATE TABLE users (id bigint);\n"})
+    
+    with extract_from_git_repo(url) as second:
+        with open(os.path.join(second, "schema.sql")) as f:
+            assert "bigint" in f.read()
+    # Nothing was reading the old clone any more, so it was removed
+    assert not os.path.exists(first)
+
+
+def test_git_repo_cache_refresh_keeps_open_checkout(origin_repo, git_cache):
+    """Test that refreshing a branch never changes a checkout another context is reading."""
+    origin_repo.commit({"schema.sql": "CREATE TABLE users (id integer);\n"})
+    url = f"{origin_repo.url}#main"
+    
+    with extract_from_git_repo(url) as first:
+        origin_repo.commit({"schema.sql": "CREATE TABLE users (id bigint);\n"})
+        with extract_from_git_repo(url) as second:
+            assert second != first
+            with open(os.path.join(second, "schema.sql")) as f:
+                assert "bigint" in f.read()
+        with open(os.path.join(first, "schema.sql")) as f:
+            assert "integer" in f.read()
+    
+    with extract_from_git_repo(url):
+        assert not os.path.exists(first)
+
+
+def test_git_repo_cache_kept_when_refresh_fails(origin_repo, git_cache):
+    """Test that a branch checkout falls back to the cached clone when the fetch fails."""
+    origin_repo.commit({"schema.sql": "CREATE TABLE users (id integer);\n"})
+    url = f"{origin_repo.url}#main"
+    
+    with extract_from_git_repo(url) as first:
+        pass
+    # The origin is unreachable from now on
+    origin_repo.path.rename(origin_repo.path.with_name("moved"))
+    
+    with extract_from_git_repo(url) as second:
+        assert second == first
+        assert os.path.isfile(os.path.join(second, "schema.sql"))
+
+
+def test_git_repo_sparse_target_path(origin_repo, git_cache):
+    """Test that only the target path is checked out when one is given."""
+    origin_repo.commit({
+        "schema/users.sql": "CREATE TABLE users (id integer);\n",
+        "other/orders.sql": "CREATE TABLE orders (id integer);\n",
+    })
+    
+    with extract_from_git_repo(f"{origin_repo.url}#main", "schema") as working_dir:
+        assert os.path.isfile(os.path.join(working_dir, "schema", "users.sql"))
+        assert not os.path.exists(os.path.join(working_dir, "other"))
+
+
+def test_git_repo_read_blob_bare(origin_repo, git_cache):
+    """Test reading files from a bare clone through the persistent cat-file process."""
+    origin_repo.commit({
+        "schema/users.sql": "CREATE TABLE users (id integer);\n",
+        "schema/orders.sql": "CREATE TABLE orders (id integer);\n",
+    })
+    
+    repo = extract_from_git_repo(f"{origin_repo.url}#main", "schema/users.sql", bare=True)
+    with repo as working_dir:
+        assert not os.path.exists(os.path.join(working_dir, "schema"))
+        assert repo.read_blob("schema/users.sql") == "CREATE TABLE users (id integer);\n"
+        assert repo.read_blob("schema/orders.sql") == "CREATE TABLE orders (id integer);\n"
+        assert repo.read_blob("schema/missing.sql") is None
+        # The reply for a missing path echoes the path, spaces and all
+        assert repo.read_blob("schema/a b.sql") is None
+        with pytest.raises(ValueError, match="newlines"):
+            repo.read_blob("schema/users.sql\nHEAD:schema/orders.sql")
+        # Directories are not files, and reading one must not desync later reads
+        assert repo.read_blob("schema") is None
+        assert repo.read_blob("schema/users.sql") == "CREATE TABLE users (id integer);\n"
+
+
+def test_git_repo_temp_dir_removed(origin_repo):
+    """Test that an uncached clone is removed when the context exits."""
+    origin_repo.commit({"schema.sql": "CREATE TABLE users (id integer);\n"})
+    
+    with extract_from_git_repo(f"{origin_repo.url}#main", use_cache=False) as working_dir:
+        assert os.path.isfile(os.path.join(working_dir, "schema.sql"))
+    
+    assert not os.path.exists(working_dir)
+
+
+def test_git_repo_commit_ref(origin_repo, git_cache):
+    """Test checking out a specific commit, sparse and bare."""
+    commit = origin_repo.commit({
+        "other.sql": "CREATE TABLE other (id integer);\n",
+        "schema/users.sql": "CREATE TABLE users (id integer);\n",
+    })
+    origin_repo.commit({"schema/users.sql": "CREATE TABLE users (id bigint);\n"})
+    url = f"{origin_repo.url}#{commit}"
+    
+    with extract_from_git_repo(url, "schema") as working_dir:
+        with open(os.path.join(working_dir, "schema", "users.sql")) as f:
+            assert "integer" in f.read()
+        assert not os.path.exists(os.path.join(working_dir, "other.sql"))
+    
+    repo = extract_from_git_repo(url, "schema/users.sql", bare=True)
+    with repo:
+        assert repo.read_blob("schema/users.sql") == "CREATE TABLE users (id integer);\n"
+
+
+def test_git_repo_failed_commit_checkout_not_cached(origin_repo, git_cache):
+    """Test that a failed commit checkout leaves no cache entry behind to be reused."""
+    origin_repo.commit({"a.sql": "CREATE TABLE a (id integer);\n"})
+    url = f"{origin_repo.url}#{'0' * 40}"
+    
+    for _ in range(2):
+        with pytest.raises(ValueError, match="Failed to checkout commit"):
+            with extract_from_git_repo(url):
+                pass
+    
+    assert [p.name for p in git_cache.iterdir() if not p.name.endswith(".lock")] == []
@@ -155,11 +155,6 @@ def test_parse_constraint():
     
     result = parse_sql_to_ast_objects(sql)
     
-    print(f"Parsed {len(result)} objects")
-    for i, obj in enumerate(result):
-        print(f"Object {i}: {obj.query_type.value} - {obj.object_name}")
-        print(f"  Command: {obj.command[:100]}...")
-    
     assert len(result) == 1
     obj = result[0]
     assert obj.query_type == BuildStage.CONSTRAINT
@@ -198,4 +193,362 @@ def test_legacy_compatibility():
     assert len(result) == 1
     obj = result[0]
     assert obj.query_type == BuildStage.BASE_TABLE
-    assert obj.object_name == "users" 
\ No newline at end of file
+    assert obj.object_name == "users" 
+
+def test_extract_build_queries_legacy_dicts():
+    """Test that the legacy dict format keeps field names and values, with its own dependency list."""
+    sql = """
+    CREATE TABLE legacy_users (id INTEGER PRIMARY KEY);
+    CREATE INDEX idx_legacy_users_id ON legacy_users(id);
+    """
+    
+    table, index = extract_build_queries(sql, use_ast_objects=False)
+    
+    assert table["command"] == "CREATE TABLE legacy_users (id INTEGER PRIMARY KEY);"
+    assert table["query_type"] == BuildStage.BASE_TABLE
+    assert [col.name for col in table["columns"]] == ["id"]
+    assert "ast_node" in table
+    
+    index["dependencies"].append("leak")
+    assert extract_build_queries(sql, use_ast_objects=False)[1]["dependencies"] == ["legacy_users"]
+
+def test_parse_parallel_matches_sequential(monkeypatch):
+    """Test that parsing with a process pool gives the same result as a single pass."""
+    import pg_compose_core.lib.parser as parser
+    
+    sql = "\n".join(
+        f"""
+    CREATE TABLE t{i} (
+        id SERIAL PRIMARY KEY,
+        name TEXT NOT NULL
+    );
+    CREATE INDEX idx_t{i}_name ON t{i}(name);
+    """
+        for i in range(40)
+    )
+    monkeypatch.setattr(parser, "PARALLEL_PARSE_THRESHOLD", 0)
+    
+    sequential = parse_sql_to_ast_objects(sql)
+    parser.clear_parse_cache()
+    parallel = parse_sql_to_ast_objects(sql, workers=2)
+    
+    assert len(parallel) == len(sequential) == 80
+    for seq_obj, par_obj in zip(sequential, parallel):
+        assert par_obj.object_name == seq_obj.object_name
+        assert par_obj.query_hash == seq_obj.query_hash
+        assert par_obj.query_start_pos == seq_obj.query_start_pos
+        assert par_obj.query_end_pos == seq_obj.query_end_pos
+        assert sql[par_obj.query_start_pos:par_obj.query_end_pos] == par_obj.command
+    
+    parser.clear_parse_cache()
+    monkeypatch.setattr(parser.os, "cpu_count", lambda: 2)
+    auto = parse_sql_to_ast_objects(sql, workers=0)
+    
+    assert [obj.query_hash for obj in auto] == [obj.query_hash for obj in sequential]
+
+
+def test_parse_parallel_keeps_begin_atomic_bodies_whole(monkeypatch):
+    """Test that batch boundaries never fall inside a BEGIN ATOMIC function body."""
+    import pg_compose_core.lib.parser as parser
+    
+    sql = "\n".join(
+        f"""
+    CREATE TABLE a{i} (id INTEGER);
+    CREATE FUNCTION count_a{i}() RETURNS bigint LANGUAGE sql
+    BEGIN ATOMIC
+        SELECT count(*) FROM a{i};
+        SELECT 1;
+    END;
+    """
+        for i in range(6)
+    )
+    monkeypatch.setattr(parser, "PARALLEL_PARSE_THRESHOLD", 0)
+    
+    sequential = parse_sql_to_ast_objects(sql)
+    parser.clear_parse_cache()
+    parallel = parse_sql_to_ast_objects(sql, workers=2)
+    parser.clear_parse_cache()
+    
+    assert len(parallel) == len(sequential) == 12
+    assert [obj.query_hash for obj in parallel] == [obj.query_hash for obj in sequential]
+    assert [obj.query_start_pos for obj in parallel] == [obj.query_start_pos for obj in sequential]
+
+
+def test_parse_error_includes_sql_context():
+    """Test that parse failures report the leading lines of the SQL."""
+    sql = "CREATE TABL users (id INTEGER);\n" + "\n".join(f"-- line {i}" for i in range(12))
+    
+    with pytest.raises(ValueError) as exc_info:
+        parse_sql_to_ast_objects(sql)
+    
+    message = str(exc_info.value)
+    assert message.startswith("Failed to parse SQL:")
+    assert " 1: CREATE TABL users (id INTEGER);" in message
+    assert "... and 3 more lines" in message
+
+
+def test_iter_build_queries_streams_objects():
+    """Test that the streaming API yields the same objects as the list API."""
+    from pg_compose_core.lib.parser import iter_build_queries
+    
+    sql = """
+    CREATE TABLE users (id INTEGER PRIMARY KEY);
+    CREATE INDEX idx_users_id ON users(id);
+    GRANT SELECT ON users TO app_user;
+    """
+    
+    stream = iter_build_queries(sql)
+    assert not isinstance(stream, list)
+    
+    streamed = list(stream)
+    expected = parse_sql_to_ast_objects(sql)
+    assert [obj.object_name for obj in streamed] == [obj.object_name for obj in expected]
+    assert [obj.query_hash for obj in streamed] == [obj.query_hash for obj in expected]
+
+
+def test_ascii_and_unicode_hashes_match():
+    """Test that the ASCII bytes fast path hashes the same as the str path."""
+    from pg_compose_core.lib.hashing import normalize_sql, hash_sql
+    
+    statement = "CREATE TABLE users (\n    id INTEGER, -- key\n\tname TEXT\n);"
+    ascii_obj = parse_sql_to_ast_objects(statement)[0]
+    # A non-ASCII comment elsewhere forces the str path for the whole input
+    unicode_obj = parse_sql_to_ast_objects(statement + "\n-- café\n")[0]
+    
+    assert ascii_obj.query_hash == unicode_obj.query_hash == hash_sql(normalize_sql(statement))
+
+
+def test_direct_and_parsed_hashes_match():
+    """Test that an ASTObject built directly hashes the same as one from the parser."""
+    from pg_compose_core.lib.ast.objects import ASTObject
+    
+    statement = "CREATE TABLE direct (\n    id INTEGER\n);"
+    parsed = parse_sql_to_ast_objects(statement)[0]
+    direct = ASTObject(command=parsed.command, object_name="direct")
+    
+    assert direct.query_hash == parsed.query_hash
+
+
+def test_direct_object_hash_normalization():
+    """Test that direct ASTObject hashes only ignore -- comments and whitespace."""
+    from pg_compose_core.lib.ast.objects import ASTObject
+    
+    def hash_of(command):
+        return ASTObject(command=command).query_hash
+    
+    base = hash_of("DROP TABLE users;")
+    assert hash_of("  DROP\n\tTABLE users; -- gone\n") == base
+    # Case, block comments and spacing around punctuation are part of the hash
+    assert hash_of("drop table users;") != base
+    assert hash_of("DROP /* old */ TABLE users;") != base
+    assert hash_of("ALTER TABLE users DROP COLUMN a, DROP COLUMN b;") != \
+        hash_of("ALTER TABLE users DROP COLUMN a,DROP COLUMN b;")
+
+
+def test_parse_results_are_cached():
+    """Test that reparsing identical SQL returns fresh copies of the cached objects."""
+    sql = "CREATE TABLE cached_users (id INTEGER PRIMARY KEY);"
+    
+    first = parse_sql_to_ast_objects(sql)
+    second = parse_sql_to_ast_objects(sql)
+    
+    assert first is not second
+    assert first[0] is not second[0]
+    assert first[0] == second[0]
+    
+    # Mutating a returned object must not leak into later parses
+    first[0].object_name = "renamed"
+    first[0].dependencies.append("leak")
+    third = parse_sql_to_ast_objects(sql)
+    assert third[0].object_name == "cached_users"
+    assert third[0].dependencies == []
+    
+    # Mutating a returned list must not leak into the cache
+    first.clear()
+    assert len(parse_sql_to_ast_objects(sql)) == 1
+    
+    # Clearing the cache forces a fresh parse
+    from pg_compose_core.lib.parser import clear_parse_cache
+    clear_parse_cache()
+    assert parse_sql_to_ast_objects(sql)[0] is not second[0]
+    
+    # grants is part of the cache key
+    grant_sql = "GRANT SELECT ON cached_users TO app_user;"
+    assert len(parse_sql_to_ast_objects(grant_sql)) == 1
+    assert len(parse_sql_to_ast_objects(grant_sql, grants=False)) == 0
+
+
+def test_cached_objects_are_not_shared(tmp_path):
+    """Test that nested table/function metadata and directory loads are copied out of the cache."""
+    from pg_compose_core.lib.parser import load_source
+    
+    sql = """
+    CREATE TABLE copied (id INTEGER, CONSTRAINT pk_copied PRIMARY KEY (id));
+    CREATE FUNCTION copied_fn(a INTEGER) RETURNS INTEGER LANGUAGE sql AS $$ SELECT a $$;
+    """
+    (tmp_path / "copied.sql").write_text(sql)
+    
+    for load in (lambda: parse_sql_to_ast_objects(sql), lambda: load_source(str(tmp_path))):
+        table, function = load()
+        table.columns[0].name = "changed"
+        table.constraints.clear()
+        function.parameters[0].data_type = "TEXT"
+        
+        table, function = load()
+        assert table.columns[0].name == "id"
+        assert len(table.constraints) == 1
+        assert function.parameters[0].data_type == "int4"
+
+
+def test_load_source_directory_parses_files_separately(tmp_path):
+    """Test that directory sources are parsed per file, with per-file positions."""
+    from pg_compose_core.lib.parser import load_source
+    
+    for i in range(5):
+        (tmp_path / f"t{i}.sql").write_text(f"-- table {i}\nCREATE TABLE t{i} (id INTEGER);\n")
+    
+    result = load_source(str(tmp_path))
+    
+    assert [obj.object_name for obj in result] == [f"t{i}" for i in range(5)]
+    for obj in result:
+        assert obj.query_start_pos == len("-- table 0\n")
+        assert obj.command == f"CREATE TABLE {obj.object_name} (id INTEGER);"
+
+
+def test_load_source_directory_parses_small_inputs_in_process(tmp_path, monkeypatch):
+    """Test that directories only use a process pool for large inputs on more than one CPU."""
+    from pg_compose_core.lib import parser
+    
+    for i in range(6):
+        (tmp_path / f"s{i}.sql").write_text(f"CREATE TABLE s{i} (id INTEGER);\n")
+    
+    def no_pool(*args, **kwargs):
+        raise AssertionError("process pool started")
+    
+    monkeypatch.setattr(parser, "ProcessPoolExecutor", no_pool)
+    parser.clear_parse_cache()
+    assert len(parser.load_source(str(tmp_path))) == 6
+    
+    # Even above the size threshold, a single CPU stays serial
+    monkeypatch.setattr(parser, "PARALLEL_PARSE_THRESHOLD", 0)
+    monkeypatch.setattr(parser.os, "cpu_count", lambda: 1)
+    parser.clear_parse_cache()
+    serial = parser.load_source(str(tmp_path))
+    
+    # Large inputs on several CPUs are parsed in the pool, with the same result
+    monkeypatch.undo()
+    monkeypatch.setattr(parser, "PARALLEL_PARSE_THRESHOLD", 0)
+    monkeypatch.setattr(parser.os, "cpu_count", lambda: 2)
+    parser.clear_parse_cache()
+    pooled = parser.load_source(str(tmp_path))
+    parser.clear_parse_cache()
+    
+    assert [obj.query_hash for obj in pooled] == [obj.query_hash for obj in serial]
+    assert len(serial) == 6
+
+
+def test_load_source_directory_reuses_cached_files(tmp_path, monkeypatch):
+    """Test that reloading a directory takes unchanged files from the parse cache."""
+    from pg_compose_core.lib import parser
+    
+    for i in range(5):
+        (tmp_path / f"c{i}.sql").write_text(f"CREATE TABLE c{i} (id INTEGER);\n")
+    
+    parser.clear_parse_cache()
+    first = parser.load_source(str(tmp_path))
+    
+    def fail(*args, **kwargs):
+        raise AssertionError("cached file was parsed again")
+    
+    monkeypatch.setattr(parser, "_parse_sql_batch", fail)
+    second = parser.load_source(str(tmp_path))
+    parser.clear_parse_cache()
+    
+    assert [obj.query_hash for obj in second] == [obj.query_hash for obj in first]
+
+
+def test_parse_table_foreign_key_dependency():
+    """Test that table-level foreign keys add the referenced table as a dependency."""
+    sql = """
+    CREATE TABLE orders (
+        id INTEGER PRIMARY KEY,
+        user_id INTEGER,
+        CONSTRAINT fk_orders_user FOREIGN KEY (user_id) REFERENCES public.users(id)
+    );
+    """
+    result = parse_sql_to_ast_objects(sql)
+    
+    assert result[0].dependencies == ["public.users"]
+    assert [c.name for c in result[0].columns] == ["id", "user_id"]
+    assert [(c.name, c.constraint_type) for c in result[0].constraints] == [("fk_orders_user", "FOREIGN KEY")]
+
+
+def test_parse_function_parameter_defaults():
+    """Test that parameter defaults are rendered as SQL text."""
+    sql = "CREATE FUNCTION f(a INTEGER DEFAULT 5, b TEXT DEFAULT 'x') RETURNS INTEGER LANGUAGE sql AS 'SELECT a';"
+    result = parse_sql_to_ast_objects(sql)
+    
+    params = result[0].parameters
+    assert [p.name for p in params] == ["a", "b"]
+    assert [p.default_value for p in params] == ["5", "'x'"]
+
+
+def test_parse_function_body_dependencies():
+    """Test that tables referenced in a SQL function body become dependencies."""
+    sql = """
+    CREATE FUNCTION order_count() RETURNS bigint LANGUAGE sql AS $$
+        SELECT count(*) FROM public.orders o JOIN users u ON u.id = o.user_id
+        WHERE o.id IN (SELECT order_id FROM items);
+    $$;
+    """
+    result = parse_sql_to_ast_objects(sql)
+    
+    assert result[0].dependencies == ["public.orders", "users", "items"]
+
+
+def test_parse_procedure_body_write_dependencies():
+    """Test that INSERT, UPDATE and DELETE targets in a body become dependencies."""
+    sql = """
+    CREATE PROCEDURE archive() LANGUAGE sql AS $$
+        INSERT INTO archive.orders SELECT * FROM orders;
+        UPDATE stats SET archived = archived + 1;
+        DELETE FROM orders;
+    $$;
+    """
+    result = parse_sql_to_ast_objects(sql)
+    
+    assert result[0].dependencies == ["archive.orders", "orders", "stats"]
+
+
+def test_plpgsql_function_dependencies():
+    """Test that PL/pgSQL bodies are parsed through the PL/pgSQL parser."""
+    sql = """
+    CREATE FUNCTION log_change() RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN
+        NEW.updated_at := now();
+        PERFORM 1 FROM public.audit_settings;
+        IF EXISTS (SELECT 1 FROM audit_flags) THEN
+            INSERT INTO audit_log VALUES (NEW.id);
+        END IF;
+        RETURN NEW;
+    END;
+    $$;
+    """
+    result = parse_sql_to_ast_objects(sql)
+    
+    assert result[0].dependencies == ["public.audit_settings", "audit_flags", "audit_log"]
+
+
+def test_query_hash_is_fixed_blake2b():
+    """Test that query hashes are 128-bit blake2b digests of the normalized statement."""
+    import hashlib
+    from pg_compose_core.lib import parser
+    
+    parser.clear_parse_cache()
+    first = parse_sql_to_ast_objects("CREATE TABLE h (id INTEGER);")[0]
+    parser.clear_parse_cache()
+    second = parse_sql_to_ast_objects("CREATE   TABLE h (id INTEGER); -- same")[0]
+    parser.clear_parse_cache()
+    
+    assert first.query_hash == hashlib.blake2b(b"CREATE TABLE h (id INTEGER);", digest_size=16).hexdigest()
+    assert first.query_hash == second.query_hash
@@ -0,0 +1,76 @@
+"""
+Tests for dependency sorting.
+"""
+
+import pytest
+from pg_compose_core.lib.parser import parse_sql_to_ast_objects
+from pg_compose_core.lib.sorter import sort_queries
+
+
+def test_sort_orders_dependencies_first():
+    """Test that objects are sorted after the objects they depend on."""
+    sql = """
+    CREATE TABLE orders (id INTEGER, user_id INTEGER, FOREIGN KEY (user_id) REFERENCES users(id));
+    CREATE TABLE users (id INTEGER PRIMARY KEY);
+    """
+    result = sort_queries(parse_sql_to_ast_objects(sql))
+    
+    assert [obj.object_name for obj in result] == ["users", "orders"]
+
+
+def test_sort_ignores_self_and_repeated_dependencies():
+    """Test that self-references and repeated dependencies are not reported as cycles."""
+    sql = """
+    CREATE TABLE employees (
+        id INTEGER PRIMARY KEY,
+        manager_id INTEGER,
+        mentor_id INTEGER,
+        FOREIGN KEY (manager_id) REFERENCES employees(id),
+        FOREIGN KEY (mentor_id) REFERENCES employees(id)
+    );
+    CREATE TABLE reviews (
+        author_id INTEGER,
+        subject_id INTEGER,
+        FOREIGN KEY (author_id) REFERENCES employees(id),
+        FOREIGN KEY (subject_id) REFERENCES employees(id)
+    );
+    """
+    objects = parse_sql_to_ast_objects(sql)
+    
+    assert objects[1].dependencies == ["employees", "employees"]
+    assert [obj.object_name for obj in sort_queries(objects)] == ["employees", "reviews"]
+    assert [obj.object_name for obj in sort_queries(objects, use_object_names=False)] == ["employees", "reviews"]
+
+
+def test_sort_detects_cycles():
+    """Test that a genuine dependency cycle raises."""
+    sql = """
+    CREATE TABLE a (id INTEGER, b_id INTEGER, FOREIGN KEY (b_id) REFERENCES b(id));
+    CREATE TABLE b (id INTEGER, a_id INTEGER, FOREIGN KEY (a_id) REFERENCES a(id));
+    """
+    with pytest.raises(ValueError, match="Cyclic"):
+        sort_queries(parse_sql_to_ast_objects(sql))
+
+
+def test_sort_keeps_input_order_where_possible():
+    """Test that only objects with unmet dependencies move."""
+    sql = """
+    CREATE TABLE settings (id INTEGER);
+    CREATE TABLE orders (id INTEGER, user_id INTEGER, FOREIGN KEY (user_id) REFERENCES users(id));
+    CREATE TABLE audit (id INTEGER);
+    CREATE TABLE users (id INTEGER PRIMARY KEY);
+    """
+    result = sort_queries(parse_sql_to_ast_objects(sql))
+    
+    assert [obj.object_name for obj in result] == ["settings", "users", "orders", "audit"]
+
+
+def test_sort_accepts_dict_objects():
+    """Test that plain dicts sort the same way as ASTObjects."""
+    objects = [
+        {"object_name": "orders", "schema": "app", "dependencies": ["app.users"], "query_hash": "h1"},
+        {"object_name": "users", "schema": "app", "dependencies": [], "query_hash": "h2"},
+    ]
+    
+    assert [obj["object_name"] for obj in sort_queries(objects)] == ["users", "orders"]
+    assert [obj["object_name"] for obj in sort_queries(objects, use_object_names=False)] == ["users", "orders"]